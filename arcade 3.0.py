@@ -1,62 +1,109 @@
-
-
-
-
 import pygame
 import sys
+import argparse
+import os
 import random
-
-# Initialize Pygame and mixer for sound
-pygame.init()
-pygame.mixer.init()
+from text_cache import TextCache
+from dirty_render import DirtyRenderer
+from asset_cache import AssetCache
+from collision import Narrowphase
+from profiler import FrameProfiler
 
 # Screen settings
 WIDTH, HEIGHT = 800, 400
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Arcade Dragon Jump")
-
-# Load images
-dragon_img = pygame.image.load("dragon.png").convert_alpha()
-hurdle_img = pygame.image.load("hurdle.png").convert_alpha()
-background = pygame.image.load("day.png").convert_alpha()
-dragon_img = pygame.transform.scale(dragon_img, (80, 60))
-hurdle_img = pygame.transform.scale(hurdle_img, (40, 60))
-background = pygame.transform.scale(background, (WIDTH, HEIGHT))
 
 # Background scrolling variables
-bg_x1 = 0
-bg_x2 = WIDTH
 scroll_speed = 9 # Match this with hurdle speed
 
-# Load and play sounds
-pygame.mixer.music.load("arcade.mp3")
-pygame.mixer.music.set_volume(0.5)
-pygame.mixer.music.play(-1)  # Loop background music
-
 # Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 RED = (220, 20, 60)
 
 # FPS
-clock = pygame.time.Clock()
 FPS = 60
 
+# Only push changed regions while the background is standing still
+DIRTY_RECTS = False
+
 # Game variables
 gravity = 0.8
 jump_strength = -15
-score = 0
-high_score = 0
-game_over = False
 
-# Font
-font = pygame.font.Font(None, 36)
+# Window, sounds and images are created by setup(), so the game loop can
+# also be driven headless (see HurdleRun)
+screen = None
+clock = None
+dirty = None
+text_cache = None
+font = None
+dragon_img = None
+hurdle_img = None
+dragon_mask = None
+# Phase timings for HurdleRun.step(); off unless benchmark.py swaps in an enabled one
+profiler = FrameProfiler()
+hurdle_mask = None
+background = None
+laser_img = None
+assets = AssetCache()
+
+
+def load_image(filename, size, alpha=True):
+    try:
+        return assets.load(filename, size, alpha)
+    except (pygame.error, OSError):
+        img = pygame.Surface(size)
+        img.fill(RED)
+        return img
+
+
+def setup(headless=False):
+    global screen, clock, dirty, text_cache, font, dragon_img, hurdle_img, background, laser_img
+    global dragon_mask, hurdle_mask
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+    # Initialize Pygame and mixer for sound
+    pygame.init()
+    try:
+        pygame.mixer.init()
+    except pygame.error:
+        pass
+
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Arcade Dragon Jump")
+    clock = pygame.time.Clock()
+    dirty = DirtyRenderer(screen, enabled=DIRTY_RECTS)
+
+    # Load images
+    dragon_img = load_image("dragon.png", (80, 60))
+    hurdle_img = load_image("hurdle.png", (40, 60))
+    background = load_image("day.png", (WIDTH, HEIGHT))
+    laser_img = load_image("laser-bolts3.png", (40, 40), alpha=False)
+    dragon_mask = pygame.mask.from_surface(dragon_img)
+    hurdle_mask = pygame.mask.from_surface(hurdle_img)
+
+    # Font
+    text_cache = TextCache(lambda size: pygame.font.Font(None, size))
+    font = text_cache.font(36)
+
+
+def play_music():
+    # Load and play sounds
+    try:
+        pygame.mixer.music.load("arcade.mp3")
+        pygame.mixer.music.set_volume(0.5)
+        pygame.mixer.music.play(-1)  # Loop background music
+    except pygame.error:
+        pass
 
 # Dragon sprite class
 class Dragon(pygame.sprite.Sprite):
     def __init__(self):
         super().__init__()
         self.image = dragon_img
+        self.mask = dragon_mask
         self.rect = self.image.get_rect()
         self.rect.x = 50
         self.rect.y = HEIGHT - self.rect.height - 50
@@ -85,8 +132,6 @@ class Dragon(pygame.sprite.Sprite):
        pos_x=self.rect.x +22
        pos_y=0
        laser =[]
-       laser_img=pygame.image.load('laser-bolts3.png').convert()
-       laser_img=pygame.transform.scale(laser_img, (40, 40))
        laser.append(laser_img)
 
 
@@ -96,6 +141,7 @@ class Hurdle(pygame.sprite.Sprite):
     def __init__(self, x):
         super().__init__()
         self.image = hurdle_img
+        self.mask = hurdle_mask
         self.rect = self.image.get_rect()
         self.rect.x = x
         self.rect.y = HEIGHT - self.rect.height - 50
@@ -106,96 +152,143 @@ class Hurdle(pygame.sprite.Sprite):
         if self.rect.right < 0:
             self.kill()
 
-# Sprite groups
-dragon = Dragon()
-all_sprites = pygame.sprite.Group()
-all_sprites.add(dragon)
-hurdles = pygame.sprite.Group()
-
-def create_hurdle():
-    x = WIDTH + random.randint(200, 400)
-    hurdle = Hurdle(x)
-    hurdles.add(hurdle)
-    all_sprites.add(hurdle)
-
-
-# Start with one hurdle
-create_hurdle()
-
-# Main game loop
-running = True
-while running:
-    clock.tick(FPS)
-
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            running = False
-
-        if not game_over:
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_RETURN:
-                    dragon.jump()
-                    dragon.laser_shooting()
-        else:
-            if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
-                game_over = False
-                score = 0
-                hurdles.empty()
-                all_sprites.empty()
-                dragon = Dragon()
-                all_sprites.add(dragon)
-                create_hurdle()
-                # Reset background for fresh start
-                bg_x1 = 0
-                bg_x2 = WIDTH
-
-    if not game_over:
-        all_sprites.update()
+class HurdleRun:
+    # One run of the hurdle game without input or drawing. step() is a single
+    # frame of the original loop; hurdle spacing comes from a seeded rng.
+    def __init__(self, seed=None):
+        self.rng = random.Random(seed)
+        self.high_score = 0
+        self.narrowphase = Narrowphase()
+        self.reset()
+
+    def reset(self):
+        self.game_over = False
+        self.score = 0
+        self.dragon = Dragon()
+        self.all_sprites = pygame.sprite.Group()
+        self.all_sprites.add(self.dragon)
+        self.hurdles = pygame.sprite.Group()
+        self.create_hurdle()
+        # Reset background for fresh start
+        self.bg_x1 = 0
+        self.bg_x2 = WIDTH
+
+    def create_hurdle(self):
+        x = WIDTH + self.rng.randint(200, 400)
+        hurdle = Hurdle(x)
+        self.hurdles.add(hurdle)
+        self.all_sprites.add(hurdle)
+
+    def step(self):
+        if self.game_over:
+            return
+        self.advance()
+        self.narrowphase.end_tick()
+
+    def advance(self):
+        dragon = self.dragon
+        hurdles = self.hurdles
+        self.all_sprites.update()
+        profiler.mark("updates")
         # Add hurdles as needed
         if len(hurdles) == 0 or (hurdles.sprites()[-1].rect.x < WIDTH - 300):
-            create_hurdle()
-        # Check for collision
-        if pygame.sprite.spritecollideany(dragon, hurdles):
-            
-            game_over = True
-            
-            if score > high_score:
-                high_score = score
+            self.create_hurdle()
+        profiler.mark("spawn")
+        # Check for collision: rects first, then the masks
+        if self.narrowphase.filter(dragon, pygame.sprite.spritecollide(dragon, hurdles, False)):
+
+            self.game_over = True
+
+            if self.score > self.high_score:
+                self.high_score = self.score
+        profiler.mark("collisions")
         # Update score
         for hurdle in hurdles:
             if hurdle.rect.right < dragon.rect.left and not hasattr(hurdle, 'passed'):
                 hurdle.passed = True
-                score += 5
+                self.score += 5
+        profiler.mark("score")
 
         # Background scroll update
-        bg_x1 -= scroll_speed
-        bg_x2 -= scroll_speed
-        if bg_x1 <= -WIDTH:
-            bg_x1 = bg_x2 + WIDTH
-        if bg_x2 <= -WIDTH:
-            bg_x2 = bg_x1 + WIDTH
-
-    # Draw background
-    screen.blit(background, (bg_x1, 0))
-    screen.blit(background, (bg_x2, 0))
-
-    # Draw ground
-    pygame.draw.line(screen, BLACK, (0, HEIGHT - 50), (WIDTH, HEIGHT - 50), 3)
+        self.bg_x1 -= scroll_speed
+        self.bg_x2 -= scroll_speed
+        if self.bg_x1 <= -WIDTH:
+            self.bg_x1 = self.bg_x2 + WIDTH
+        if self.bg_x2 <= -WIDTH:
+            self.bg_x2 = self.bg_x1 + WIDTH
+        profiler.mark("scroll")
+
+
+def draw_background(surface, run):
+    surface.blit(background, (run.bg_x1, 0))
+    surface.blit(background, (run.bg_x2, 0))
+    pygame.draw.line(surface, BLACK, (0, HEIGHT - 50), (WIDTH, HEIGHT - 50), 3)
+
+
+def render(run):
+    # The background only stands still on the game over screen
+    if run.game_over:
+        if dirty.background is None:
+            frozen = pygame.Surface((WIDTH, HEIGHT)).convert()
+            draw_background(frozen, run)
+            dirty.set_background(frozen)
+    else:
+        dirty.set_background(None)
+
+    # Draw background and ground
+    if not dirty.begin():
+        draw_background(screen, run)
 
     # Draw sprites
-    all_sprites.draw(screen)
+    dirty.draw_group(run.all_sprites)
 
     # Display score and high score
-    score_text = font.render(f"Score: {score}", True, BLACK)
-    high_score_text = font.render(f"High Score: {high_score}", True, BLACK)
-    screen.blit(score_text, (10, 10))
-    screen.blit(high_score_text, (10, 40))
-
-    if game_over:
-        go_text = font.render("DAMN LOSER! Press Enter to Restart", True, BLACK)
-        screen.blit(go_text, (WIDTH // 2 - go_text.get_width() // 2, HEIGHT // 2))
-
-    pygame.display.flip()
-
-pygame.quit()
-sys.exit()
+    score_text = text_cache.render(f"Score: {run.score}", 36, BLACK)
+    high_score_text = text_cache.render(f"High Score: {run.high_score}", 36, BLACK)
+    dirty.blit(score_text, (10, 10))
+    dirty.blit(high_score_text, (10, 40))
+
+    if run.game_over:
+        go_text = text_cache.render("DAMN LOSER! Press Enter to Restart", 36, BLACK)
+        dirty.blit(go_text, (WIDTH // 2 - go_text.get_width() // 2, HEIGHT // 2))
+
+    dirty.present()
+
+
+def main():
+    setup()
+    play_music()
+    # Start with one hurdle
+    run = HurdleRun()
+
+    # Main game loop
+    running = True
+    while running:
+        clock.tick(FPS)
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+
+            if not run.game_over:
+                if event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_RETURN:
+                        run.dragon.jump()
+                        run.dragon.laser_shooting()
+            else:
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
+                    run.reset()
+
+        run.step()
+        render(run)
+
+    pygame.quit()
+    sys.exit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dragon hurdle jump")
+    parser.add_argument("--dirty", action="store_true", help="only push changed screen regions when possible")
+    args = parser.parse_args()
+    DIRTY_RECTS = args.dirty
+    main()
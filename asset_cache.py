@@ -0,0 +1,74 @@
+import glob
+import hashlib
+import os
+import struct
+
+import pygame
+
+ASSET_CACHE_DIR = ".asset_cache"
+HEADER = struct.Struct("<II")
+tobytes = getattr(pygame.image, "tobytes", None) or pygame.image.tostring
+
+
+class AssetCache:
+    # Images are decoded and scaled once, then stored on disk as raw RGBA
+    # pixels keyed by source path, target size, mtime and file size, so the
+    # next start only has to read them back with frombuffer(). Loaded
+    # surfaces are also kept in memory so nothing is decoded twice per run.
+    def __init__(self, cache_dir=ASSET_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.images = {}
+        self.hits = 0
+        self.misses = 0
+
+    def cache_path(self, path, size, st):
+        ident = hashlib.sha1(f"{path}|{size}".encode()).hexdigest()[:16]
+        stamp = hashlib.sha1(f"{st.st_mtime_ns}|{st.st_size}".encode()).hexdigest()[:12]
+        return os.path.join(self.cache_dir, f"{ident}-{stamp}.rgba"), ident
+
+    def read(self, cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        if len(data) < HEADER.size:
+            return None
+        w, h = HEADER.unpack_from(data)
+        if len(data) != HEADER.size + w * h * 4:
+            return None
+        return pygame.image.frombuffer(memoryview(data)[HEADER.size:], (w, h), "RGBA")
+
+    def write(self, cache_path, ident, img):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            for stale in glob.glob(os.path.join(self.cache_dir, ident + "-*.rgba")):
+                os.remove(stale)
+            tmp = cache_path + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(HEADER.pack(*img.get_size()))
+                f.write(tobytes(img, "RGBA"))
+            os.replace(tmp, cache_path)
+        except OSError:
+            pass
+
+    def load(self, filename, size=None, alpha=True):
+        path = os.path.abspath(filename)
+        key = (path, size, alpha)
+        img = self.images.get(key)
+        if img is not None:
+            return img
+        st = os.stat(path)
+        cache_path, ident = self.cache_path(path, size, st)
+        raw = self.read(cache_path)
+        if raw is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            raw = pygame.image.load(path)
+            if size:
+                raw = pygame.transform.scale(raw.convert_alpha(), size)
+            self.write(cache_path, ident, raw)
+        img = raw.convert_alpha() if alpha else raw.convert()
+        self.images[key] = img
+        return img
@@ -0,0 +1,176 @@
+import argparse
+import asyncio
+import time
+
+from framing import HEADER, MAX_FRAME
+
+HOST = '127.0.0.1'
+PORT = 5000
+DEFAULT_CONNECTIONS = 8
+DEFAULT_DEPTH = 16
+DEFAULT_SIZE = 64
+DEFAULT_DURATION = 5.0
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class PipelinedConnection:
+    # One TCP connection with up to `depth` requests in flight. Requests go
+    # out as length-prefixed frames (see framing.py) and replies come back
+    # in order, so a single reader task matches them to requests first-in
+    # first-out.
+    def __init__(self, host=HOST, port=PORT, depth=DEFAULT_DEPTH):
+        self.host = host
+        self.port = port
+        self.slots = asyncio.Semaphore(depth)
+        self.waiting = asyncio.Queue()
+        self.reader = None
+        self.writer = None
+        self.reader_task = None
+        self.error = None
+        self.sent_bytes = 0
+        self.received_bytes = 0
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        self.reader_task = asyncio.create_task(self.read_replies())
+        return self
+
+    async def read_replies(self):
+        future = None
+        try:
+            while True:
+                future = await self.waiting.get()
+                size = HEADER.unpack(await self.reader.readexactly(HEADER.size))[0]
+                if size > MAX_FRAME:
+                    raise ConnectionError(f"frame of {size} bytes is over the limit")
+                data = await self.reader.readexactly(size)
+                self.received_bytes += HEADER.size + size
+                if not future.done():
+                    future.set_result(data)
+                future = None
+        except (asyncio.IncompleteReadError, ConnectionError) as exc:
+            error = ConnectionError(f"connection lost: {exc}")
+            self.error = error  # later requests fail fast instead of waiting forever
+            if future is not None and not future.done():
+                future.set_exception(error)
+            while not self.waiting.empty():
+                future = self.waiting.get_nowait()
+                if not future.done():
+                    future.set_exception(error)
+
+    async def request(self, payload):
+        async with self.slots:
+            if self.error is not None:
+                raise self.error
+            future = asyncio.get_running_loop().create_future()
+            self.waiting.put_nowait(future)
+            self.writer.writelines((HEADER.pack(len(payload)), payload))
+            self.sent_bytes += HEADER.size + len(payload)
+            await self.writer.drain()
+            return await future
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+        if self.reader_task is not None:
+            self.reader_task.cancel()
+            try:
+                await self.reader_task
+            except asyncio.CancelledError:
+                pass
+
+
+async def load_worker(conn, payload, deadline, rtts):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter_ns()
+        reply = await conn.request(payload)
+        rtts.append(time.perf_counter_ns() - start)
+        if len(reply) != len(payload):
+            raise ConnectionError("short reply")
+
+
+async def run_load(host=HOST, port=PORT, connections=DEFAULT_CONNECTIONS, depth=DEFAULT_DEPTH,
+                   size=DEFAULT_SIZE, duration=DEFAULT_DURATION):
+    # Opens `connections` connections and keeps `depth` requests in flight
+    # on each for `duration` seconds. Returns throughput and RTT stats.
+    conns = [await PipelinedConnection(host, port, depth).open() for _ in range(connections)]
+    payload = bytes(i % 256 for i in range(size))
+    rtts = []
+    start = time.perf_counter()
+    deadline = start + duration
+    try:
+        await asyncio.gather(*(load_worker(conn, payload, deadline, rtts)
+                               for conn in conns for _ in range(depth)))
+    finally:
+        elapsed = time.perf_counter() - start
+        for conn in conns:
+            await conn.close()
+    ordered = sorted(rtts)
+    total_bytes = sum(conn.sent_bytes + conn.received_bytes for conn in conns)
+    return {
+        "connections": connections,
+        "depth": depth,
+        "size": size,
+        "seconds": elapsed,
+        "messages": len(rtts),
+        "messages_per_s": len(rtts) / elapsed,
+        "bytes_per_s": total_bytes / elapsed,
+        "rtt_p50_ms": percentile(ordered, 0.5) / 1e6,
+        "rtt_p95_ms": percentile(ordered, 0.95) / 1e6,
+        "rtt_p99_ms": percentile(ordered, 0.99) / 1e6,
+        "rtt_max_ms": (ordered[-1] if ordered else 0) / 1e6,
+    }
+
+
+async def interactive(host=HOST, port=PORT):
+    # Same prompt as client.py, but each line is sent without waiting for
+    # the previous reply; replies are printed as they come back.
+    conn = await PipelinedConnection(host, port).open()
+    loop = asyncio.get_running_loop()
+    replies = []
+
+    async def show(message):
+        data = await conn.request(message.encode())
+        print("Received from server:", data.decode())
+
+    message = await loop.run_in_executor(None, input, "Enter message to send (type 'quit' to exit): ")
+    while message.lower() != 'quit':
+        if message:
+            replies.append(asyncio.create_task(show(message)))
+        message = await loop.run_in_executor(None, input, "Enter message to send (type 'quit' to exit): ")
+    await asyncio.gather(*replies)
+    await conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pipelined asyncio client for the echo server")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--load", action="store_true", help="generate load instead of reading messages from stdin")
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS)
+    parser.add_argument("--depth", type=int, default=DEFAULT_DEPTH, help="requests in flight per connection")
+    parser.add_argument("--size", type=int, default=DEFAULT_SIZE, help="payload bytes per message")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds to run the load for")
+    args = parser.parse_args()
+    if not args.load:
+        asyncio.run(interactive(args.host, args.port))
+        return
+    stats = asyncio.run(run_load(args.host, args.port, args.connections, args.depth, args.size, args.duration))
+    print(f"{stats['messages']} messages in {stats['seconds']:.2f}s over {stats['connections']} connections "
+          f"x {stats['depth']} in flight")
+    print(f"{stats['messages_per_s']:.0f} msg/s  {stats['bytes_per_s'] / 1e6:.2f} MB/s")
+    print(f"rtt p50 {stats['rtt_p50_ms']:.3f} ms  p95 {stats['rtt_p95_ms']:.3f} ms  "
+          f"p99 {stats['rtt_p99_ms']:.3f} ms  max {stats['rtt_max_ms']:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
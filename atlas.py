@@ -0,0 +1,54 @@
+import pygame
+
+ATLAS_WIDTH = 512
+ATLAS_PADDING = 1
+
+
+class TextureAtlas:
+    # Packs sprite images into one display-format surface with simple shelf
+    # packing (tallest first). Every key maps to an area of that surface, so
+    # a whole group can be drawn with one blits() call of (atlas, dest, area)
+    # tuples. Adding the same surface under several keys stores it once.
+    # A collision mask is built per image alongside its area.
+    def __init__(self, width=ATLAS_WIDTH, padding=ATLAS_PADDING):
+        self.width = width
+        self.padding = padding
+        self.pending = {}
+        self.areas = {}
+        self.images = {}
+        self.masks = {}
+        self.surface = None
+
+    def add(self, key, image):
+        self.pending[key] = image
+
+    def build(self):
+        placed = {}
+        order = sorted({id(img): img for img in self.pending.values()}.values(),
+                       key=lambda img: img.get_height(), reverse=True)
+        x = y = shelf = 0
+        for img in order:
+            w, h = img.get_size()
+            if x and x + w > self.width:
+                x, y, shelf = 0, y + shelf + self.padding, 0
+            placed[id(img)] = pygame.Rect(x, y, w, h)
+            x += w + self.padding
+            shelf = max(shelf, h)
+        self.surface = pygame.Surface((self.width, max(1, y + shelf)), pygame.SRCALPHA).convert_alpha()
+        self.surface.fill((0, 0, 0, 0))
+        for img in order:
+            # RGBA_MAX onto a cleared surface copies pixels and alpha as-is.
+            self.surface.blit(img, placed[id(img)], special_flags=pygame.BLEND_RGBA_MAX)
+        masks = {}
+        for key, img in self.pending.items():
+            area = placed[id(img)]
+            self.areas[key] = area
+            self.images[key] = self.surface.subsurface(area)
+            if id(img) not in masks:
+                masks[id(img)] = pygame.mask.from_surface(self.images[key])
+            self.masks[key] = masks[id(img)]
+        self.pending = {}
+        return self.surface
+
+    def frame(self, key):
+        return self.images[key], self.areas[key], self.masks[key]
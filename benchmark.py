@@ -0,0 +1,239 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import pygame
+
+import robot_vs_villains_deluxe_Version2 as rvv
+from profiler import FrameProfiler
+
+ARCADE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "arcade 3.0.py")
+DEFAULT_THRESHOLD = 0.10
+IMMORTAL = 10 ** 9
+
+
+def load_arcade():
+    spec = importlib.util.spec_from_file_location("arcade_dragon_jump", ARCADE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def top_up(sim, count, level=4):
+    speed = rvv.VILLAIN_SPEEDS[level - 1]
+    kinds = ("basic", "fast", "tank")
+    while len(sim.villains) < count:
+        kind = kinds[len(sim.villains) % 3]
+        sim.villains.add(rvv.Villain(kind, speed, sim.engine, sim.rng))
+
+
+# Each scenario returns a callable that runs one tick.
+
+def scenario_level4_waves(seed):
+    # Level 4 with the initial wave and both mixed waves on screen at once.
+    sim = rvv.Simulation(level=4, seed=seed)
+    sim.robot.health = IMMORTAL
+    count = rvv.VILLAIN_WAVES[3] + 2 * (rvv.VILLAIN_WAVES[3] // 3 * 2 + rvv.VILLAIN_WAVES[3] // 2)
+
+    def tick():
+        top_up(sim, count)
+        move, shoot = rvv.autopilot(sim)
+        sim.step(move, shoot)
+    return tick
+
+
+def scenario_boss_rapid_fire(seed):
+    sim = rvv.Simulation(level=4, seed=seed)
+    for villain in sim.villains.sprites():
+        villain.kill()
+    sim.boss_spawned = True
+    sim.bosses.add(rvv.Boss(health=IMMORTAL, rng=sim.rng))
+    robot = sim.robot
+    robot.health = IMMORTAL
+
+    def tick():
+        robot.add_powerup("double_shot", rvv.FPS)
+        robot.add_powerup("rapid_fire", rvv.FPS)
+        move, shoot = rvv.autopilot(sim)
+        sim.step(move, shoot)
+    return tick
+
+
+def scenario_villains_10k(seed):
+    sim = rvv.Simulation(level=1, seed=seed)
+    sim.robot.health = IMMORTAL
+    top_up(sim, 10000, level=1)
+
+    def tick():
+        top_up(sim, 10000, level=1)
+        sim.step((0, 0), False)
+    return tick
+
+
+def scenario_hurdle_run(seed):
+    arcade = load_arcade()
+    arcade.setup(headless=True)
+    arcade.profiler = rvv.profiler
+    run = arcade.HurdleRun(seed)
+
+    def tick():
+        if run.game_over:
+            run.reset()
+        dragon = run.dragon
+        for hurdle in run.hurdles:
+            if 0 < hurdle.rect.left - dragon.rect.right < 40:
+                dragon.jump()
+                break
+        run.step()
+    return tick
+
+
+def scenario_particles_50k(seed):
+    # Keep ~50k particles alive; each tick integrates and draws all of them.
+    from particles import ParticleSystem
+    particles = ParticleSystem(seed=seed)
+    rng = particles.rng
+
+    def tick():
+        particles.emit((rng.uniform(0, rvv.WIDTH), rng.uniform(0, rvv.HEIGHT)), 1700, (255, 140, 40), 5, 60)
+        particles.update()
+        particles.draw(rvv.screen)
+    return tick
+
+
+SCENARIOS = {
+    "level4_waves": (scenario_level4_waves, 600),
+    "boss_rapid_fire": (scenario_boss_rapid_fire, 1200),
+    "villains_10k": (scenario_villains_10k, 60),
+    "hurdle_run": (scenario_hurdle_run, 20000),
+    "particles_50k": (scenario_particles_50k, 600),
+}
+
+
+def peak_rss_kb():
+    # Peak for the whole process, which is why each scenario runs in its own.
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def run_scenario(name, seed=0, scale=1.0):
+    build, ticks = SCENARIOS[name]
+    ticks = max(1, int(ticks * scale))
+
+    # Timed pass with the phase profiler on.
+    rvv.profiler = FrameProfiler(window=ticks, enabled=True)
+    tick = build(seed)
+    profiler = rvv.profiler
+    start = time.perf_counter()
+    for _ in range(ticks):
+        profiler.begin_frame()
+        tick()
+        profiler.end_frame()
+    elapsed = time.perf_counter() - start
+    phases = {phase: sum(samples) / len(samples) / 1e6 for phase, samples in profiler.samples.items()}
+    rvv.profiler = FrameProfiler()
+
+    # Separate pass for allocations; tracemalloc slows everything down.
+    tracemalloc.start()
+    tick = build(seed)
+    tracemalloc.reset_peak()
+    base, _ = tracemalloc.get_traced_memory()
+    for _ in range(ticks):
+        tick()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "ticks": ticks,
+        "seconds": elapsed,
+        "ticks_per_s": ticks / elapsed,
+        "phase_ms_per_tick": phases,
+        "alloc_peak_kb": (peak - base) / 1024,
+        "alloc_retained_kb": (current - base) / 1024,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+
+def run_isolated(name, seed=0, scale=1.0):
+    # A fresh interpreter per scenario, so peak RSS belongs to that scenario
+    # alone and not to the heaviest one run before it.
+    cmd = [sys.executable, os.path.abspath(__file__), "--child", name, "--seed", str(seed), "--scale", str(scale)]
+    out = subprocess.run(cmd, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, result in results["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            print(f"{name:<18} no baseline")
+            continue
+        change = result["ticks_per_s"] / old["ticks_per_s"] - 1
+        flag = "REGRESSION" if change < -threshold else "ok"
+        print(f"{name:<18} {old['ticks_per_s']:10.0f} -> {result['ticks_per_s']:10.0f} ticks/s ({change:+.1%}) {flag}")
+        if flag != "ok":
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless throughput benchmarks for both games")
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run (default: all of %s)" % ", ".join(SCENARIOS))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the tick count of every scenario")
+    parser.add_argument("--out", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a results file written with --out")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fractional ticks/s drop that counts as a regression")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}")
+
+    if args.child:
+        rvv.setup(headless=True)
+        print(json.dumps(run_scenario(args.child, args.seed, args.scale)))
+        return
+    results = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "numpy_engine": rvv.USE_VILLAIN_ENGINE,
+        "steering": rvv.STEERING,
+        "seed": args.seed,
+        "scenarios": {},
+    }
+    for name in args.scenarios or list(SCENARIOS):
+        result = run_isolated(name, args.seed, args.scale)
+        results["scenarios"][name] = result
+        print(f"{name:<18} {result['ticks_per_s']:10.0f} ticks/s  alloc peak {result['alloc_peak_kb']:8.1f} KB  "
+              f"rss {result['peak_rss_kb']} KB")
+        for phase, ms in result["phase_ms_per_tick"].items():
+            print(f"    {phase:<16} {ms:8.4f} ms/tick")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
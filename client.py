@@ -1,21 +1,165 @@
+import argparse
+import queue
 import socket
+import sys
+import threading
+import time
+from collections import deque
 
-def client_program():
-    host = '127.0.0.1'  # The server's IP address
-    port = 5000  # The server's port
+from conn_pool import ConnectionPool, CONNECT_TIMEOUT, READ_TIMEOUT
+from framing import FrameSocket, FrameBatcher, BATCH_BYTES, BATCH_DELAY
 
-    client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    client_socket.connect((host, port))  # Connect to server
+HOST = '127.0.0.1'  # The server's IP address
+PORT = 5000  # The server's port
+
+def client_program(host=HOST, port=PORT, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
+    # Messages are length-prefixed frames, so any size goes through whole.
+    # The pool reconnects with backoff if the server restarts in between.
+    pool = ConnectionPool(host, port, size=1, connect_timeout=connect_timeout, read_timeout=read_timeout)
 
     message = input("Enter message to send (type 'quit' to exit): ")
 
     while message.lower() != 'quit':
-        client_socket.send(message.encode())  # Send message to server
-        data = client_socket.recv(1024).decode()  # Receive echoed message
-        print("Received from server:", data)
+        try:
+            data = str(pool.request(message.encode(), idempotent=True), 'utf-8')  # Send and receive echoed message
+            print("Received from server:", data)
+        except (ConnectionError, OSError) as exc:
+            print("Server unavailable:", exc)
         message = input("Enter message to send (type 'quit' to exit): ")
 
-    client_socket.close()
+    pool.close()
+    return pool.metrics()
+
+def read_messages(source, lines):
+    # Feeds one message per line; None marks the end of the stream
+    for line in source:
+        lines.put(line.rstrip(b"\r\n"))
+    lines.put(None)
+
+def batch_program(source, host=HOST, port=PORT, max_bytes=BATCH_BYTES, max_delay=BATCH_DELAY,
+                  connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
+    # Replays messages from a binary stream. Frames are coalesced into large
+    # writes by a FrameBatcher while a reader thread takes replies in order
+    # and matches each one to the oldest unanswered request. A server that
+    # drops the connection, or leaves the oldest request unanswered for
+    # read_timeout, ends the run early; the stats then cover what got through
+    # and "error" says why.
+    conn = FrameSocket.connect(host, port, timeout=connect_timeout)
+    conn.sock.settimeout(read_timeout)
+    batcher = FrameBatcher(conn, max_bytes, max_delay)
+    pending = deque()
+    lock = threading.Lock()
+    state = {"sent": 0, "received": 0, "done": False, "mismatched": 0, "reply_bytes": 0, "latency": [],
+             "error": None}
+
+    def fail(exc):
+        with lock:
+            if state["error"] is None and not (state["done"] and state["received"] == state["sent"]):
+                state["error"] = f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
+
+    def read_replies():
+        try:
+            while True:
+                try:
+                    reply = conn.recv()
+                except socket.timeout:
+                    if not pending or time.perf_counter() - pending[0][1] < read_timeout:
+                        continue  # Nothing overdue; the source is just slow
+                    raise
+                size, sent_at = pending.popleft()
+                with lock:
+                    state["received"] += 1
+                    state["reply_bytes"] += len(reply)
+                    state["latency"].append(time.perf_counter() - sent_at)
+                    if len(reply) != size:
+                        state["mismatched"] += 1
+                    if state["done"] and state["received"] == state["sent"]:
+                        return
+        except (ConnectionError, OSError, IndexError, ValueError) as exc:
+            fail(exc)
+
+    lines = queue.Queue(maxsize=4096)
+    threading.Thread(target=read_messages, args=(source, lines), daemon=True).start()
+    reader = threading.Thread(target=read_replies, daemon=True)
+    reader.start()
+
+    start = time.perf_counter()
+    try:
+        while state["error"] is None:
+            try:
+                message = lines.get(timeout=batcher.timeout())
+            except queue.Empty:
+                batcher.flush()  # Oldest frame has waited max_delay
+                continue
+            if message is None:
+                break
+            pending.append((len(message), time.perf_counter()))
+            with lock:
+                state["sent"] += 1
+            batcher.add(message)
+        batcher.flush()
+    except (ConnectionError, OSError, ValueError) as exc:
+        fail(exc)
+    with lock:
+        state["done"] = True
+        finished = state["received"] == state["sent"]
+    if finished or state["error"] is not None:
+        try:
+            conn.sock.shutdown(socket.SHUT_RDWR)  # Wakes the reader
+        except OSError:
+            pass
+    # Each of the reader's waits is bounded by read_timeout, so this only
+    # runs out if replies keep trickling in; the reader is a daemon then.
+    reader.join(read_timeout * 2)
+    if reader.is_alive():
+        fail(TimeoutError(f"replies still arriving {read_timeout * 2:.0f}s after the last send"))
+    elapsed = time.perf_counter() - start
+    conn.close()
+
+    with lock:
+        latency = sorted(state["latency"])
+        received = state["received"]
+        reply_bytes = state["reply_bytes"]
+    def pick(q):
+        return latency[min(len(latency) - 1, int(q * len(latency)))] * 1000 if latency else 0
+    return {
+        "messages": state["sent"],
+        "replies": received,
+        "mismatched": state["mismatched"],
+        "writes": batcher.writes,
+        "messages_per_write": state["sent"] / batcher.writes if batcher.writes else 0,
+        "seconds": elapsed,
+        "messages_per_s": received / elapsed if elapsed else 0,
+        "bytes_per_s": (batcher.bytes + reply_bytes) / elapsed if elapsed else 0,
+        "latency_p50_ms": pick(0.5),
+        "latency_p99_ms": pick(0.99),
+        "error": state["error"],
+    }
 
 if __name__ == '__main__':
-    client_program()
+    parser = argparse.ArgumentParser(description="Client for the echo server")
+    parser.add_argument("--batch", metavar="FILE", help="replay one message per line from FILE ('-' for stdin)")
+    parser.add_argument("--batch-bytes", type=int, default=BATCH_BYTES, help="flush once this many bytes are queued")
+    parser.add_argument("--batch-delay-ms", type=float, default=BATCH_DELAY * 1000, help="flush once the oldest message has waited this long")
+    parser.add_argument("--connect-timeout", type=float, default=CONNECT_TIMEOUT, help="seconds to wait for a connection")
+    parser.add_argument("--read-timeout", type=float, default=READ_TIMEOUT, help="seconds to wait for a reply")
+    args = parser.parse_args()
+    if not args.batch:
+        metrics = client_program(connect_timeout=args.connect_timeout, read_timeout=args.read_timeout)
+        print(f"{metrics['requests']} requests, {metrics['connects']} connects "
+              f"({metrics['connect_ms_mean']:.2f} ms mean), {metrics['reconnects']} reconnects")
+    else:
+        source = sys.stdin.buffer if args.batch == '-' else open(args.batch, 'rb')
+        try:
+            with source:
+                stats = batch_program(source, max_bytes=args.batch_bytes, max_delay=args.batch_delay_ms / 1000,
+                                      connect_timeout=args.connect_timeout, read_timeout=args.read_timeout)
+        except OSError as exc:
+            sys.exit(f"Server unavailable: {exc}")
+        print(f"{stats['replies']}/{stats['messages']} replies in {stats['seconds']:.2f}s, "
+              f"{stats['writes']} writes ({stats['messages_per_write']:.0f} messages each), "
+              f"{stats['mismatched']} mismatched")
+        print(f"{stats['messages_per_s']:.0f} msg/s  {stats['bytes_per_s'] / 1e6:.2f} MB/s  "
+              f"latency p50 {stats['latency_p50_ms']:.2f} ms  p99 {stats['latency_p99_ms']:.2f} ms")
+        if stats['error']:
+            sys.exit(f"Stopped early: {stats['error']}")
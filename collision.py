@@ -0,0 +1,46 @@
+NARROWPHASE_BUDGET = 2000
+
+
+class Narrowphase:
+    # Pixel-perfect check for pairs that already passed a rect broadphase.
+    # Sprites carry a mask built once per image at load (sprite.mask), so a
+    # test is one Mask.overlap() call. Tests are counted per tick; past the
+    # budget the remaining pairs keep their rect result instead, so a
+    # crowded tick can't blow up the cost.
+    def __init__(self, budget=NARROWPHASE_BUDGET):
+        self.budget = budget
+        self.tests = 0
+        self.last = 0
+        self.peak = 0
+        self.total = 0
+        self.ticks = 0
+        self.over_budget = 0
+
+    def overlap(self, a, b):
+        if self.tests >= self.budget:
+            self.over_budget += 1
+            return True
+        self.tests += 1
+        ra = a.rect
+        rb = b.rect
+        return a.mask.overlap(b.mask, (rb.x - ra.x, rb.y - ra.y)) is not None
+
+    def filter(self, sprite, candidates):
+        return [other for other in candidates if self.overlap(sprite, other)]
+
+    def end_tick(self):
+        self.last = self.tests
+        if self.tests > self.peak:
+            self.peak = self.tests
+        self.total += self.tests
+        self.ticks += 1
+        self.tests = 0
+
+    def stats(self):
+        return {
+            "budget": self.budget,
+            "last": self.last,
+            "peak": self.peak,
+            "mean": self.total / self.ticks if self.ticks else 0.0,
+            "over_budget": self.over_budget,
+        }
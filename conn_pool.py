@@ -0,0 +1,230 @@
+import random
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from framing import FrameSocket
+
+POOL_SIZE = 4
+CONNECT_TIMEOUT = 3.0
+READ_TIMEOUT = 5.0
+KEEPALIVE_IDLE = 30
+KEEPALIVE_INTERVAL = 10
+KEEPALIVE_COUNT = 3
+BACKOFF_BASE = 0.05
+BACKOFF_MAX = 2.0
+MAX_RETRIES = 5
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+def configure_socket(sock, keepalive=True, nodelay=True):
+    if nodelay:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    if keepalive:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        # Linux names; other platforms keep their system defaults.
+        for name, value in (("TCP_KEEPIDLE", KEEPALIVE_IDLE), ("TCP_KEEPINTVL", KEEPALIVE_INTERVAL),
+                            ("TCP_KEEPCNT", KEEPALIVE_COUNT)):
+            if hasattr(socket, name):
+                sock.setsockopt(socket.IPPROTO_TCP, getattr(socket, name), value)
+
+
+def is_healthy(conn):
+    # An idle connection should have nothing to read. A non-blocking peek
+    # that finds data means the server either closed it (b"") or sent bytes
+    # nobody asked for, and the connection is out of step either way.
+    sock = conn.sock
+    timeout = sock.gettimeout()
+    try:
+        sock.setblocking(False)
+        sock.recv(1, socket.MSG_PEEK)
+    except BlockingIOError:
+        return True
+    except OSError:
+        return False
+    finally:
+        try:
+            sock.settimeout(timeout)
+        except OSError:
+            pass
+    return False
+
+
+class ConnectionPool:
+    # Bounded pool of framed connections to one server. acquire() hands out
+    # an idle connection that passes a health check, opens a new one while
+    # under `size`, or waits for a release. Connects and reads have
+    # timeouts; failed connects are retried with jittered exponential
+    # backoff, and request() resends on a new connection when the old one
+    # breaks before the request is out (or at any point, for idempotent
+    # requests), so a server restart costs a retry instead of the process.
+    # reconnects counts connections opened to replace dropped ones.
+    def __init__(self, host, port, size=POOL_SIZE, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 keepalive=True, nodelay=True, max_retries=MAX_RETRIES, backoff_base=BACKOFF_BASE,
+                 backoff_max=BACKOFF_MAX):
+        self.host = host
+        self.port = port
+        self.size = size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.keepalive = keepalive
+        self.nodelay = nodelay
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.cond = threading.Condition()
+        self.idle = []
+        self.active = 0
+        self.opening = 0
+        self.closed = False
+        self.connects = 0
+        self.connect_failures = 0
+        self.lost = 0
+        self.reconnects = 0
+        self.retries = 0
+        self.health_failures = 0
+        self.requests = 0
+        self.connect_ms_total = 0.0
+        self.connect_ms_max = 0.0
+
+    def backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def connect(self):
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+            except OSError:
+                with self.cond:
+                    self.connect_failures += 1
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+            ms = (time.perf_counter() - start) * 1000
+            sock.settimeout(self.read_timeout)
+            configure_socket(sock, self.keepalive, self.nodelay)
+            with self.cond:
+                self.connects += 1
+                if self.lost:
+                    self.lost -= 1
+                    self.reconnects += 1
+                self.connect_ms_total += ms
+                self.connect_ms_max = max(self.connect_ms_max, ms)
+            return FrameSocket(sock)
+
+    def take(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.cond:
+            while True:
+                if self.closed:
+                    raise RuntimeError("pool is closed")
+                while self.idle:
+                    conn = self.idle.pop()
+                    if is_healthy(conn):
+                        self.active += 1
+                        return conn
+                    self.health_failures += 1
+                    self.lost += 1
+                    conn.close()
+                if self.active + self.opening < self.size:
+                    self.opening += 1
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise PoolTimeout(f"no connection free within {timeout}s")
+                self.cond.wait(remaining)
+        try:
+            conn = self.connect()
+        except BaseException:
+            with self.cond:
+                self.opening -= 1
+                self.cond.notify()
+            raise
+        with self.cond:
+            self.opening -= 1
+            self.active += 1
+        return conn
+
+    def give_back(self, conn, broken=False):
+        with self.cond:
+            self.active -= 1
+            if broken:
+                self.lost += 1
+            if broken or self.closed:
+                conn.close()
+            else:
+                self.idle.append(conn)
+            self.cond.notify()
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        conn = self.take(timeout)
+        try:
+            yield conn
+        except BaseException:
+            self.give_back(conn, broken=True)
+            raise
+        self.give_back(conn)
+
+    def request(self, payload, timeout=None, idempotent=False):
+        # One framed round trip; returns the reply as bytes. A failure
+        # before the payload is fully sent is retried on a new connection.
+        # After that the server may already have acted on it, so the error
+        # (a read timeout, say) is raised unless the caller marks the
+        # request idempotent.
+        attempt = 0
+        while True:
+            conn = self.take(timeout)
+            sent = False
+            try:
+                conn.send(payload)
+                sent = True
+                reply = bytes(conn.recv())
+            except (OSError, ConnectionError) as exc:
+                self.give_back(conn, broken=True)
+                if sent and not idempotent:
+                    raise
+                if attempt >= self.max_retries:
+                    raise ConnectionError(f"request failed after {attempt + 1} attempts: {exc}") from exc
+                with self.cond:
+                    self.retries += 1
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+            self.give_back(conn)
+            with self.cond:
+                self.requests += 1
+            return reply
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            for conn in self.idle:
+                conn.close()
+            self.idle = []
+            self.cond.notify_all()
+
+    def metrics(self):
+        with self.cond:
+            return {
+                "size": self.size,
+                "active": self.active,
+                "idle": len(self.idle),
+                "connects": self.connects,
+                "connect_failures": self.connect_failures,
+                "reconnects": self.reconnects,
+                "retries": self.retries,
+                "health_failures": self.health_failures,
+                "requests": self.requests,
+                "connect_ms_mean": self.connect_ms_total / self.connects if self.connects else 0.0,
+                "connect_ms_max": self.connect_ms_max,
+            }
@@ -0,0 +1,89 @@
+import pygame
+
+DIRTY_FULL_RATIO = 0.5
+
+
+class DirtyRenderer:
+    # Records what is drawn each frame so the next frame only has to erase
+    # those rects from a static background and push old + new rects with
+    # pygame.display.update(). Without a static background (scrolling), when
+    # disabled, or when the dirty area passes full_ratio of the screen, the
+    # frame is flipped whole instead.
+    def __init__(self, surface, background=None, enabled=True, full_ratio=DIRTY_FULL_RATIO):
+        self.surface = surface
+        self.screen_rect = surface.get_rect()
+        self.background = background
+        self.enabled = enabled
+        self.full_ratio = full_ratio
+        self.erase = []
+        self.last = []
+        self.rects = []
+        self.values = {}
+        self.full = True
+        self.flips = 0
+        self.updates = 0
+
+    def set_background(self, background):
+        if background is not self.background:
+            self.background = background
+            self.full = True
+
+    def invalidate(self):
+        self.full = True
+
+    def begin(self):
+        # Returns True when the previous frame was erased in place; False
+        # means the caller has to repaint the whole background itself.
+        if not self.enabled or self.background is None:
+            self.full = True
+            self.erase = []
+            return False
+        if self.full:
+            self.surface.blit(self.background, (0, 0))
+        else:
+            for rect in self.erase:
+                self.surface.blit(self.background, rect, rect)
+        self.last = self.erase
+        self.erase = []
+        return True
+
+    def add(self, rect, erase=True):
+        rect = self.screen_rect.clip(rect)
+        if rect.width and rect.height:
+            self.rects.append(rect)
+            if erase:
+                self.erase.append(rect)
+        return rect
+
+    def blit(self, image, dest, area=None, erase=True):
+        return self.add(self.surface.blit(image, dest, area), erase)
+
+    def draw_group(self, group):
+        rects = self.surface.blits([(sprite.image, sprite.rect) for sprite in group])
+        for rect in rects:
+            self.add(rect)
+        return rects
+
+    def touches(self, rect):
+        return self.full or rect.collidelist(self.last) != -1 or rect.collidelist(self.rects) != -1
+
+    def changed(self, key, value):
+        if self.full or self.values.get(key) != value:
+            self.values[key] = value
+            return True
+        return False
+
+    def present(self):
+        rects = self.last + self.rects
+        area = 0
+        for rect in rects:
+            area += rect.width * rect.height
+        if not self.enabled or self.full or area > self.full_ratio * self.screen_rect.width * self.screen_rect.height:
+            pygame.display.flip()
+            self.flips += 1
+        else:
+            pygame.display.update(rects)
+            self.updates += 1
+        self.last = []
+        self.rects = []
+        self.full = False
@@ -0,0 +1,74 @@
+import argparse
+import socket
+import socketserver
+import threading
+
+from framing import FrameSocket
+
+HOST = '127.0.0.1'
+PORT = 5000
+
+
+class EchoHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = FrameSocket(self.request)
+        with self.server.lock:
+            self.server.clients.add(self.request)
+        try:
+            while True:
+                conn.send(conn.recv())
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            with self.server.lock:
+                self.server.clients.discard(self.request)
+
+
+class EchoServer(socketserver.ThreadingTCPServer):
+    # Local stand-in for the real server: echoes every length-prefixed frame
+    # back on the same connection, one thread per client. start() runs it in
+    # the background so the client pool can be exercised offline, and
+    # stop() drops it, listening socket and open connections, to simulate a restart.
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, host=HOST, port=PORT):
+        super().__init__((host, port), EchoHandler)
+        self.thread = None
+        self.lock = threading.Lock()
+        self.clients = set()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        with self.lock:
+            for sock in self.clients:
+                try:
+                    sock.shutdown(socket.SHUT_RDWR)
+                except OSError:
+                    pass
+        if self.thread is not None:
+            self.thread.join()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Framed echo server for testing the clients offline")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+    server = EchoServer(args.host, args.port)
+    print(f"Echoing on {args.host}:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
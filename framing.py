@@ -0,0 +1,117 @@
+import socket
+import struct
+import time
+
+HEADER = struct.Struct("!I")
+MAX_FRAME = 16 * 1024 * 1024
+RECV_BUFFER = 64 * 1024
+
+
+class FrameSocket:
+    # Length-prefixed messages over a stream socket: a 4-byte big-endian
+    # payload length, then the payload. Frames are read with recv_into()
+    # into one preallocated buffer, grown only for a larger frame, so recv()
+    # returns a memoryview that stays valid until the next recv(). send()
+    # writes header and payload with one scatter-gather sendmsg() where the
+    # platform has it, without joining them first.
+    def __init__(self, sock, buffer_size=RECV_BUFFER, max_frame=MAX_FRAME):
+        self.sock = sock
+        self.max_frame = max_frame
+        self.buffer = bytearray(buffer_size)
+        self.view = memoryview(self.buffer)
+        self.header = bytearray(HEADER.size)
+        self.header_view = memoryview(self.header)
+        self.out_header = bytearray(HEADER.size)
+        self.use_sendmsg = hasattr(sock, "sendmsg")
+
+    @classmethod
+    def connect(cls, host, port, timeout=None, **kwargs):
+        sock = socket.create_connection((host, port), timeout=timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return cls(sock, **kwargs)
+
+    def send(self, payload):
+        if len(payload) > self.max_frame:
+            raise ValueError(f"frame of {len(payload)} bytes is over the {self.max_frame} byte limit")
+        HEADER.pack_into(self.out_header, 0, len(payload))
+        if not self.use_sendmsg:
+            self.sock.sendall(self.out_header)
+            self.sock.sendall(payload)
+            return
+        parts = [memoryview(self.out_header), memoryview(payload).cast("B")]
+        while parts:
+            sent = self.sock.sendmsg(parts)
+            while parts and sent >= len(parts[0]):
+                sent -= len(parts[0])
+                parts.pop(0)
+            if parts and sent:
+                parts[0] = parts[0][sent:]
+
+    def recv_exact(self, view):
+        got = 0
+        size = len(view)
+        while got < size:
+            n = self.sock.recv_into(view[got:])
+            if n == 0:
+                raise ConnectionError("connection closed mid-frame" if got else "connection closed")
+            got += n
+
+    def recv(self):
+        self.recv_exact(self.header_view)
+        size = HEADER.unpack(self.header)[0]
+        if size > self.max_frame:
+            raise ValueError(f"frame of {size} bytes is over the {self.max_frame} byte limit")
+        if size > len(self.buffer):
+            self.buffer = bytearray(max(size, len(self.buffer) * 2))
+            self.view = memoryview(self.buffer)
+        payload = self.view[:size]
+        self.recv_exact(payload)
+        return payload
+
+    def close(self):
+        self.sock.close()
+
+
+BATCH_BYTES = 64 * 1024
+BATCH_DELAY = 0.005
+
+
+class FrameBatcher:
+    # Coalesces outgoing frames into one buffer and writes it with a single
+    # sendall() once it holds max_bytes or its oldest frame has waited
+    # max_delay seconds - Nagle-style, but with our own thresholds. The
+    # caller polls timeout() to know how long it may block before flushing.
+    def __init__(self, conn, max_bytes=BATCH_BYTES, max_delay=BATCH_DELAY):
+        self.conn = conn
+        self.max_bytes = max_bytes
+        self.max_delay = max_delay
+        self.buffer = bytearray()
+        self.oldest = None
+        self.frames = 0
+        self.writes = 0
+        self.bytes = 0
+
+    def add(self, payload):
+        if len(payload) > self.conn.max_frame:
+            raise ValueError(f"frame of {len(payload)} bytes is over the {self.conn.max_frame} byte limit")
+        if self.oldest is None:
+            self.oldest = time.perf_counter()
+        self.buffer += HEADER.pack(len(payload))
+        self.buffer += payload
+        self.frames += 1
+        if len(self.buffer) >= self.max_bytes:
+            self.flush()
+
+    def timeout(self):
+        if self.oldest is None:
+            return None
+        return max(0.0, self.oldest + self.max_delay - time.perf_counter())
+
+    def flush(self):
+        if not self.buffer:
+            return
+        self.conn.sock.sendall(self.buffer)
+        self.writes += 1
+        self.bytes += len(self.buffer)
+        self.buffer.clear()
+        self.oldest = None
@@ -0,0 +1,267 @@
+import argparse
+import asyncio
+import bisect
+import json
+import struct
+import time
+from collections import OrderedDict
+
+from framing import HEADER, MAX_FRAME
+from save_worker import write_file
+
+HOST = '127.0.0.1'
+PORT = 5001
+LEADERBOARD_FILE = "leaderboard.json"
+LEADERBOARD_LIMIT = 100
+SNAPSHOT_INTERVAL = 5.0
+RECENT_SUBMISSIONS = 4096
+NAME_BYTES = 16
+MAX_SCORE = 2 ** 32 - 1  # scores travel as unsigned 32-bit
+
+# Every message is one length-prefixed frame (see framing.py) whose first
+# byte is the opcode. Integers are big-endian; names are UTF-8, NUL-padded
+# to NAME_BYTES.
+#   SUBMIT  -> op, submission id (Q), score (I), name
+#   RANK    <- op, submission id (Q), rank (I, 0 = outside the top N)
+#   TOP     -> op, k (H)
+#   ENTRIES <- op, count (H), then count x (score (I), name)
+#   ERROR   <- op, UTF-8 message
+OP_SUBMIT = 1
+OP_RANK = 2
+OP_TOP = 3
+OP_ENTRIES = 4
+OP_ERROR = 255
+SUBMIT = struct.Struct(f"!BQI{NAME_BYTES}s")
+RANK = struct.Struct("!BQI")
+TOP = struct.Struct("!BH")
+ENTRIES = struct.Struct("!BH")
+ENTRY = struct.Struct(f"!I{NAME_BYTES}s")
+
+
+def encode_name(name):
+    data = name.encode("utf-8")[:NAME_BYTES]
+    return data.decode("utf-8", "ignore").encode("utf-8")  # never split a character
+
+
+def decode_name(data):
+    return data.rstrip(b"\0").decode("utf-8", "replace")
+
+
+def encode_submit(submission_id, score, name):
+    return SUBMIT.pack(OP_SUBMIT, submission_id, score, encode_name(name))
+
+
+def decode_rank(payload):
+    op, submission_id, rank = RANK.unpack_from(payload)
+    if op != OP_RANK:
+        raise ValueError(f"expected a rank reply, got opcode {op}")
+    return submission_id, rank
+
+
+def encode_top(k):
+    return TOP.pack(OP_TOP, k)
+
+
+def decode_entries(payload):
+    op, count = ENTRIES.unpack_from(payload)
+    if op != OP_ENTRIES:
+        raise ValueError(f"expected an entries reply, got opcode {op}")
+    return [(score, decode_name(name))
+            for score, name in ENTRY.iter_unpack(payload[ENTRIES.size:ENTRIES.size + count * ENTRY.size])]
+
+
+class TopScores:
+    # The best `limit` scores, kept sorted best first as (-score, seq, name)
+    # keys, so insort places a new score in O(log N) plus a short memmove and
+    # ties go to whoever got there first. The packed ENTRY records are cached
+    # as one bytes object, rebuilt only after a change, so a top-K reply is a
+    # single O(K) slice of it.
+    def __init__(self, limit=LEADERBOARD_LIMIT):
+        self.limit = limit
+        self.keys = []
+        self.seq = 0
+        self.packed = b""
+
+    def add(self, score, name):
+        self.seq += 1
+        key = (-score, self.seq, encode_name(name))
+        if len(self.keys) >= self.limit and key >= self.keys[-1]:
+            return 0
+        index = bisect.bisect(self.keys, key)
+        self.keys.insert(index, key)
+        del self.keys[self.limit:]
+        self.packed = None
+        return index + 1
+
+    def top(self, k):
+        if self.packed is None:
+            self.packed = b"".join(ENTRY.pack(-neg, name) for neg, _, name in self.keys)
+        k = min(k, len(self.keys))
+        return k, self.packed[:k * ENTRY.size]
+
+    def entries(self):
+        return [(-neg, decode_name(name)) for neg, _, name in self.keys]
+
+    def load(self, entries):
+        for score, name in entries:
+            self.add(int(score), name)
+
+    def __len__(self):
+        return len(self.keys)
+
+
+class LeaderboardServer:
+    # asyncio server holding the top-N index in memory. Each connection is
+    # read one frame at a time and answered in order. Submissions carry a
+    # client-chosen id; ids seen recently are answered with the rank they
+    # got the first time, so a client retrying after a lost reply doesn't
+    # enter the same score twice. The index is snapshotted every
+    # snapshot_interval seconds when it has changed, and again on close(),
+    # with the file write run off the event loop. The recent ids go into
+    # the snapshot too, so a resend that reaches a restarted server is
+    # still recognised.
+    def __init__(self, path=LEADERBOARD_FILE, limit=LEADERBOARD_LIMIT, snapshot_interval=SNAPSHOT_INTERVAL):
+        self.path = path
+        self.scores = TopScores(limit)
+        self.recent = OrderedDict()
+        self.dirty = False
+        self.load()
+        self.snapshot_interval = snapshot_interval
+        self.server = None
+        self.snapshot_task = None
+        self.writers = set()
+        self.submissions = 0
+        self.duplicates = 0
+        self.queries = 0
+        self.snapshots = 0
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.scores.load(data.get("entries", []))
+            for submission_id, rank in data.get("recent", [])[-RECENT_SUBMISSIONS:]:
+                self.recent[int(submission_id)] = int(rank)
+        except (OSError, ValueError, TypeError, AttributeError):
+            pass
+
+    def snapshot(self):
+        return json.dumps({"saved": time.time(), "entries": self.scores.entries(),
+                           "recent": list(self.recent.items())})
+
+    def submit(self, submission_id, score, name):
+        rank = self.recent.get(submission_id)
+        if rank is not None:
+            self.duplicates += 1
+            return rank
+        rank = self.scores.add(score, name)
+        self.recent[submission_id] = rank
+        if len(self.recent) > RECENT_SUBMISSIONS:
+            self.recent.popitem(last=False)
+        self.dirty = True
+        self.submissions += 1
+        return rank
+
+    def dispatch(self, payload):
+        op = payload[0] if payload else None
+        if op == OP_SUBMIT and len(payload) == SUBMIT.size:
+            _, submission_id, score, name = SUBMIT.unpack(payload)
+            rank = self.submit(submission_id, score, decode_name(name))
+            return (RANK.pack(OP_RANK, submission_id, rank),)
+        if op == OP_TOP and len(payload) == TOP.size:
+            self.queries += 1
+            count, entries = self.scores.top(TOP.unpack(payload)[1])
+            return ENTRIES.pack(OP_ENTRIES, count), entries
+        return (bytes((OP_ERROR,)) + f"bad request (opcode {op})".encode(),)
+
+    async def handle(self, reader, writer):
+        self.writers.add(writer)
+        try:
+            while True:
+                size = HEADER.unpack(await reader.readexactly(HEADER.size))[0]
+                if size > MAX_FRAME:
+                    break
+                parts = self.dispatch(await reader.readexactly(size))
+                writer.write(HEADER.pack(sum(map(len, parts))))
+                writer.writelines(parts)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.writers.discard(writer)
+            writer.close()
+
+    async def save(self):
+        # Cleared before the write so changes made during it mark the next
+        # snapshot; set again if the write fails, so it is retried.
+        self.dirty = False
+        text = self.snapshot()
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, write_file, self.path, "w", text)
+        except BaseException:
+            self.dirty = True
+            raise
+        self.snapshots += 1
+
+    async def snapshot_loop(self):
+        while True:
+            await asyncio.sleep(self.snapshot_interval)
+            if self.dirty:
+                try:
+                    await self.save()
+                except OSError as exc:
+                    print("Snapshot failed:", exc)
+
+    async def start(self, host=HOST, port=PORT):
+        self.server = await asyncio.start_server(self.handle, host, port)
+        self.snapshot_task = asyncio.create_task(self.snapshot_loop())
+        return self
+
+    async def close(self):
+        if self.snapshot_task is not None:
+            self.snapshot_task.cancel()
+        if self.server is not None:
+            self.server.close()
+            for writer in list(self.writers):
+                writer.close()
+            await self.server.wait_closed()
+            await asyncio.sleep(0)  # let the handlers see their connections close
+        if self.dirty:
+            await self.save()
+
+    def stats(self):
+        return {
+            "entries": len(self.scores),
+            "submissions": self.submissions,
+            "duplicates": self.duplicates,
+            "queries": self.queries,
+            "snapshots": self.snapshots,
+        }
+
+
+async def serve(host, port, path, limit, snapshot_interval):
+    server = await LeaderboardServer(path, limit, snapshot_interval).start(host, port)
+    print(f"Leaderboard on {host}:{port} with {len(server.scores)} scores from {path}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        print(server.stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leaderboard server for Robot vs Villains")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--file", default=LEADERBOARD_FILE, help="snapshot file to load and save")
+    parser.add_argument("--limit", type=int, default=LEADERBOARD_LIMIT, help="scores kept in the table")
+    parser.add_argument("--snapshot-interval", type=float, default=SNAPSHOT_INTERVAL, help="seconds between snapshots")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.file, args.limit, args.snapshot_interval))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
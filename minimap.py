@@ -0,0 +1,74 @@
+import pygame
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+MINIMAP_HZ = 15
+MINIMAP_BG = (10, 10, 30)
+MINIMAP_BORDER = (200, 200, 200)
+STAMP_KEY = (255, 0, 254)
+
+
+class Minimap:
+    # Cached minimap widget. The empty frame and one marker stamp per kind
+    # are rendered once; refresh() projects each layer's positions in one
+    # batch and stamps them with a single blits() call. Between refreshes
+    # draw() just blits the cached surface.
+    def __init__(self, rect, world_size, fps=60, hz=MINIMAP_HZ):
+        self.rect = pygame.Rect(rect)
+        self.world_w, self.world_h = world_size
+        self.frame = pygame.Surface(self.rect.size).convert()
+        self.frame.fill(MINIMAP_BG)
+        self.border = self.frame.get_rect()
+        self.surface = self.frame.copy()
+        self.stamps = {}
+        self.fps = fps
+        self.set_rate(hz)
+        self.counter = self.every  # so the first due() refreshes straight away
+        self.refreshes = 0
+
+    def set_rate(self, hz):
+        if hz <= 0:
+            raise ValueError(f"minimap rate must be positive, got {hz}")
+        self.hz = hz
+        self.every = max(1, round(self.fps / hz))
+
+    def add_marker(self, kind, color, radius):
+        stamp = pygame.Surface((radius * 2 + 1, radius * 2 + 1)).convert()
+        stamp.fill(STAMP_KEY)
+        stamp.set_colorkey(STAMP_KEY, pygame.RLEACCEL)
+        pygame.draw.circle(stamp, color, (radius, radius), radius)
+        self.stamps[kind] = (stamp, radius)
+
+    def due(self):
+        self.counter += 1
+        if self.counter >= self.every:
+            self.counter = 0
+            return True
+        return False
+
+    def project(self, xs, ys):
+        # Same truncation as int((x / width) * size) per marker.
+        w, h = self.rect.size
+        if np is not None and len(xs) > 16:
+            px = np.trunc(np.asarray(xs) / self.world_w * w).astype(int)
+            py = np.trunc(np.asarray(ys) / self.world_h * h).astype(int)
+            return zip(px.tolist(), py.tolist())
+        return [(int((x / self.world_w) * w), int((y / self.world_h) * h)) for x, y in zip(xs, ys)]
+
+    def refresh(self, layers):
+        # layers: (kind, xs, ys) in drawing order, world-space centers.
+        surface = self.surface
+        surface.blit(self.frame, (0, 0))
+        for kind, xs, ys in layers:
+            if not len(xs):
+                continue
+            stamp, r = self.stamps[kind]
+            surface.blits([(stamp, (x - r, y - r)) for x, y in self.project(xs, ys)], False)
+        pygame.draw.rect(surface, MINIMAP_BORDER, self.border, 2)
+        self.refreshes += 1
+
+    def draw(self, surface):
+        return surface.blit(self.surface, self.rect)
@@ -0,0 +1,113 @@
+import math
+
+import numpy as np
+import pygame
+
+PARTICLE_CAPACITY = 65536
+PARTICLE_GRAVITY = 0.15
+PARTICLE_DRAG = 0.96
+PARTICLE_SIZE = 2
+
+
+class ParticleSystem:
+    # Particle state lives in preallocated arrays used as a ring buffer:
+    # emit() writes at the head and, once full, overwrites the oldest
+    # particles, so memory and per-frame cost are capped by the capacity.
+    # update() integrates everything in a few array ops and draw() writes
+    # the live particles straight into a pixels2d view of the target, or
+    # falls back to one blits() call for surfaces that can't be viewed.
+    # Particles are visual only and use their own rng, not the game's.
+    def __init__(self, capacity=PARTICLE_CAPACITY, seed=None):
+        self.capacity = capacity
+        self.x = np.zeros(capacity, np.float32)
+        self.y = np.zeros(capacity, np.float32)
+        self.vx = np.zeros(capacity, np.float32)
+        self.vy = np.zeros(capacity, np.float32)
+        self.life = np.zeros(capacity, np.int16)
+        self.color = np.zeros(capacity, np.uint8)
+        self.palette = []
+        self.mapped = {}
+        self.dots = {}
+        self.head = 0
+        self.emitted = 0
+        self.rng = np.random.default_rng(seed)
+
+    def color_index(self, color):
+        color = tuple(color)
+        if color not in self.palette:
+            self.palette.append(color)
+        return self.palette.index(color)
+
+    def emit(self, pos, count, color, speed=4.0, life=30):
+        count = min(count, self.capacity)
+        idx = (self.head + np.arange(count)) % self.capacity
+        self.head = (self.head + count) % self.capacity
+        rng = self.rng
+        angle = rng.uniform(0, 2 * math.pi, count)
+        mag = rng.uniform(0.2, 1.0, count) * speed
+        self.x[idx] = pos[0]
+        self.y[idx] = pos[1]
+        self.vx[idx] = np.cos(angle) * mag
+        self.vy[idx] = np.sin(angle) * mag
+        self.life[idx] = rng.integers(life // 2, life + 1, count)
+        self.color[idx] = self.color_index(color)
+        self.emitted += count
+
+    def update(self):
+        self.x += self.vx
+        self.y += self.vy
+        self.vx *= PARTICLE_DRAG
+        self.vy *= PARTICLE_DRAG
+        self.vy += PARTICLE_GRAVITY
+        np.subtract(self.life, 1, out=self.life, where=self.life > 0)
+
+    def live(self):
+        return int(np.count_nonzero(self.life > 0))
+
+    def clear(self):
+        self.life[:] = 0
+
+    def draw(self, surface, scale=1.0):
+        # Returns the rect covering what was drawn, or None.
+        w, h = surface.get_size()
+        idx = np.flatnonzero(self.life > 0)
+        if not len(idx):
+            return None
+        if scale == 1:
+            xs = self.x[idx].astype(np.int32)
+            ys = self.y[idx].astype(np.int32)
+        else:
+            xs = (self.x[idx] * scale).astype(np.int32)
+            ys = (self.y[idx] * scale).astype(np.int32)
+        inside = (xs >= 0) & (xs < w - PARTICLE_SIZE) & (ys >= 0) & (ys < h - PARTICLE_SIZE)
+        xs = xs[inside]
+        ys = ys[inside]
+        if not len(xs):
+            return None
+        colors = self.color[idx[inside]]
+        try:
+            pixels = pygame.surfarray.pixels2d(surface)
+        except ValueError:
+            self.draw_blits(surface, xs, ys, colors)
+        else:
+            mapped = self.mapped.get(surface.get_masks())
+            if mapped is None or len(mapped) != len(self.palette):
+                mapped = np.array([surface.map_rgb(c) for c in self.palette]).astype(pixels.dtype)
+                self.mapped[surface.get_masks()] = mapped
+            values = mapped[colors]
+            for ox in range(PARTICLE_SIZE):
+                for oy in range(PARTICLE_SIZE):
+                    pixels[xs + ox, ys + oy] = values
+            del pixels
+        left = int(xs.min())
+        top = int(ys.min())
+        return pygame.Rect(left, top, int(xs.max()) - left + PARTICLE_SIZE, int(ys.max()) - top + PARTICLE_SIZE)
+
+    def draw_blits(self, surface, xs, ys, colors):
+        for c in range(len(self.palette)):
+            if c not in self.dots:
+                dot = pygame.Surface((PARTICLE_SIZE, PARTICLE_SIZE))
+                dot.fill(self.palette[c])
+                self.dots[c] = dot
+        dots = self.dots
+        surface.blits([(dots[c], (x, y)) for x, y, c in zip(xs.tolist(), ys.tolist(), colors.tolist())], False)
@@ -0,0 +1,64 @@
+import sys
+
+
+class SpritePool:
+    # Fixed-capacity free list of pre-built sprites. spawn() re-arms a free
+    # sprite with reset() and adds it to a group instead of constructing a
+    # new one; pooled sprites hand themselves back with release() when they
+    # are killed. If every sprite is in use the oldest live one is killed
+    # and reused, so a burst never loses the newest spawn; the first time
+    # that happens a warning names the pool so its capacity can be raised.
+    def __init__(self, factory, capacity, name=None):
+        self.capacity = capacity
+        self.name = name
+        self.free = [factory(self) for _ in range(capacity)]
+        self.live = {}  # in spawn order, oldest first
+        self.in_use = 0
+        self.high_water = 0
+        self.spawned = 0
+        self.recycled = 0
+        self.dropped = 0
+
+    def spawn(self, group, *args):
+        if not self.free and not self.recycle():
+            self.dropped += 1
+            return None
+        sprite = self.free.pop()
+        sprite.reset(*args)
+        group.add(sprite)
+        self.live[sprite] = None
+        self.spawned += 1
+        self.in_use += 1
+        if self.in_use > self.high_water:
+            self.high_water = self.in_use
+        return sprite
+
+    def recycle(self):
+        if not self.live:
+            return False
+        oldest = next(iter(self.live))
+        if oldest.alive():
+            oldest.kill()  # hands it back through release()
+        else:
+            self.release(oldest)  # removed from its group without kill()
+        self.recycled += 1
+        if self.recycled == 1:
+            print(f"{self.name or 'sprite'} pool full at {self.capacity}; reusing the oldest sprites",
+                  file=sys.stderr)
+        return True
+
+    def release(self, sprite):
+        self.live.pop(sprite, None)
+        self.in_use -= 1
+        self.free.append(sprite)
+
+    def stats(self):
+        return {
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "occupancy": self.in_use / self.capacity if self.capacity else 0.0,
+            "high_water": self.high_water,
+            "spawned": self.spawned,
+            "recycled": self.recycled,
+            "dropped": self.dropped,
+        }
@@ -0,0 +1,135 @@
+import csv
+import json
+import time
+from collections import deque
+
+import pygame
+
+PROFILE_WINDOW = 600
+GRAPH_FRAMES = 120
+GRAPH_HEIGHT = 80
+GRAPH_BUDGET_MS = 1000 / 60
+SUMMARY_EVERY = 30
+PHASE_COLORS = [
+    (255, 99, 71), (255, 165, 0), (255, 215, 0), (154, 205, 50), (0, 206, 209),
+    (30, 144, 255), (138, 43, 226), (255, 105, 180), (210, 180, 140), (192, 192, 192),
+    (127, 255, 212), (240, 128, 128),
+]
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return 0
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class FrameProfiler:
+    # Splits each frame into named phases with perf_counter_ns. mark(phase)
+    # charges the time since the previous mark to that phase, so callers
+    # only need one call at the end of each phase. While disabled every
+    # call returns straight away.
+    def __init__(self, window=PROFILE_WINDOW, enabled=False):
+        self.enabled = enabled
+        self.overlay = False
+        self.recording = False
+        self.window = window
+        self.phases = []
+        self.samples = {}
+        self.frame = {}
+        self.recent = deque(maxlen=GRAPH_FRAMES)
+        self.records = []
+        self.frames = 0
+        self.last_ns = 0
+        self.summary = {}
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame = {}
+        self.last_ns = time.perf_counter_ns()
+
+    def mark(self, phase):
+        if not self.enabled:
+            return
+        now = time.perf_counter_ns()
+        frame = self.frame
+        frame[phase] = frame.get(phase, 0) + now - self.last_ns
+        self.last_ns = now
+
+    def skip(self):
+        # Drop time spent since the last mark (e.g. the profiler's own overlay).
+        if self.enabled:
+            self.last_ns = time.perf_counter_ns()
+
+    def end_frame(self):
+        if not self.enabled or not self.frame:
+            return
+        frame = self.frame
+        for phase, ns in frame.items():
+            samples = self.samples.get(phase)
+            if samples is None:
+                samples = self.samples[phase] = deque(maxlen=self.window)
+                self.phases.append(phase)
+            samples.append(ns)
+        self.frames += 1
+        self.recent.append(frame)
+        if self.recording:
+            self.records.append(frame)
+        self.frame = {}
+
+    def toggle_overlay(self):
+        self.overlay = not self.overlay
+        self.enabled = self.overlay or self.recording
+
+    def start_recording(self):
+        self.recording = True
+        self.enabled = True
+        self.records = []
+
+    def percentiles(self, phase):
+        ordered = sorted(self.samples.get(phase, ()))
+        return tuple(percentile(ordered, q) / 1e6 for q in (0.5, 0.95, 0.99))
+
+    def report(self):
+        return {phase: dict(zip(("p50_ms", "p95_ms", "p99_ms"), self.percentiles(phase)))
+                for phase in self.phases}
+
+    def export(self, path):
+        # One row per recorded frame, phase times in nanoseconds.
+        phases = list(self.phases)
+        if path.endswith(".json"):
+            with open(path, "w") as f:
+                json.dump({"phases": phases, "summary": self.report(), "frames": self.records}, f)
+            return
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["frame"] + phases + ["total"])
+            for i, frame in enumerate(self.records):
+                row = [frame.get(phase, 0) for phase in phases]
+                writer.writerow([i] + row + [sum(row)])
+
+    def draw_overlay(self, surface, draw_text, x, y):
+        if not self.overlay:
+            return None
+        if self.frames % SUMMARY_EVERY == 0 or not self.summary:
+            self.summary = {phase: self.percentiles(phase) for phase in self.phases}
+        width = GRAPH_FRAMES * 2
+        area = pygame.Rect(x, y, width + 260, GRAPH_HEIGHT + 20 + 18 * len(self.phases))
+        pygame.draw.rect(surface, (0, 0, 0), area)
+        colors = {phase: PHASE_COLORS[i % len(PHASE_COLORS)] for i, phase in enumerate(self.phases)}
+        scale = GRAPH_HEIGHT / (2 * GRAPH_BUDGET_MS * 1e6)
+        base = y + GRAPH_HEIGHT
+        for i, frame in enumerate(self.recent):
+            top = base
+            for phase, ns in frame.items():
+                h = int(ns * scale)
+                if h:
+                    top -= h
+                    pygame.draw.rect(surface, colors[phase], (x + i * 2, max(top, y), 2, h))
+        budget_y = base - int(GRAPH_BUDGET_MS * 1e6 * scale)
+        pygame.draw.line(surface, (255, 255, 255), (x, budget_y), (x + width, budget_y))
+        for i, phase in enumerate(self.phases):
+            p50, p95, p99 = self.summary.get(phase, (0, 0, 0))
+            draw_text(surface, f"{phase:<16} {p50:5.2f} {p95:5.2f} {p99:5.2f} ms", 16, colors[phase],
+                      x + 4, base + 8 + i * 18, center=False)
+        return area
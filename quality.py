@@ -0,0 +1,57 @@
+GOVERNOR_HIGH = 0.9
+GOVERNOR_LOW = 0.55
+GOVERNOR_SMOOTHING = 0.1
+GOVERNOR_HOLD = 90
+GOVERNOR_MAX_BACKOFF = 16
+
+
+class QualityGovernor:
+    # Picks a rung of `levels` (best first) from frame work time, i.e. the
+    # time a frame took before clock.tick() started sleeping. A moving
+    # average above GOVERNOR_HIGH of the budget steps one rung down, below
+    # GOVERNOR_LOW one rung back up. After every change it holds for
+    # `hold` frames so the average can settle on the new level. Falling
+    # straight back down after a step up doubles that hold, so a level the
+    # machine can't sustain is only retried now and then.
+    def __init__(self, levels, budget_ms, enabled=True, hold=GOVERNOR_HOLD):
+        self.levels = levels
+        self.budget_ms = budget_ms
+        self.enabled = enabled
+        self.hold = hold
+        self.level = 0
+        self.avg = None
+        self.wait = hold
+        self.backoff = 1
+        self.last_step = 0
+        self.changes = 0
+
+    def current(self):
+        return self.levels[self.level]
+
+    def update(self, frame_ms):
+        # Returns the new level's settings when it changes, else None.
+        if not self.enabled:
+            return None
+        if self.avg is None:
+            self.avg = frame_ms
+        else:
+            self.avg += GOVERNOR_SMOOTHING * (frame_ms - self.avg)
+        if self.wait > 0:
+            self.wait -= 1
+            return None
+        if self.avg > GOVERNOR_HIGH * self.budget_ms and self.level < len(self.levels) - 1:
+            self.level += 1
+            if self.last_step < 0:
+                self.backoff = min(self.backoff * 2, GOVERNOR_MAX_BACKOFF)
+            else:
+                self.backoff = 1
+            self.wait = self.hold * self.backoff
+            self.last_step = 1
+        elif self.avg < GOVERNOR_LOW * self.budget_ms and self.level > 0:
+            self.level -= 1
+            self.wait = self.hold
+            self.last_step = -1
+        else:
+            return None
+        self.changes += 1
+        return self.current()
@@ -0,0 +1,85 @@
+import pygame
+
+from atlas import TextureAtlas
+
+
+class RenderScaler:
+    # The world layer (background, sprites, particles) can be drawn into an
+    # offscreen surface at `scale` times the screen size and stretched onto
+    # the screen once per frame by present(). Sprites come from a copy of
+    # the atlas scaled for that scale; areas are looked up by the identity
+    # of the sprite's unscaled area rect. The surface and atlas for each
+    # scale are built once and kept, and prebuild() makes them ahead of
+    # time, so switching scale mid-game is only a lookup. At scale 1
+    # everything passes straight through and drawing goes to the screen as
+    # before.
+    def __init__(self, size, atlas, scale=1.0, smooth=False):
+        self.size = size
+        self.source = atlas
+        self.smooth = smooth
+        self.surface = None
+        self.scaled = {}
+        self.set_scale(scale)
+
+    def build(self, scale):
+        w, h = self.size
+        surface = pygame.Surface((int(w * scale), int(h * scale))).convert()
+        scaled = TextureAtlas()
+        for key, img in self.source.images.items():
+            iw, ih = img.get_size()
+            scaled.add(key, pygame.transform.smoothscale(img, (max(1, round(iw * scale)), max(1, round(ih * scale)))))
+        atlas = scaled.build()
+        areas = {id(area): scaled.areas[key] for key, area in self.source.areas.items()}
+        self.scaled[scale] = (surface, atlas, areas)
+        return self.scaled[scale]
+
+    def prebuild(self, scales):
+        for scale in scales:
+            if scale != 1 and scale not in self.scaled:
+                self.build(scale)
+
+    def set_scale(self, scale):
+        self.scale = scale
+        if scale == 1:
+            self.surface = None
+            self.atlas = self.source.surface
+            self.areas = None
+            return
+        self.surface, self.atlas, self.areas = self.scaled.get(scale) or self.build(scale)
+
+    def target(self, screen):
+        return screen if self.surface is None else self.surface
+
+    def pos(self, rect):
+        if self.surface is None:
+            return rect
+        return (int(rect[0] * self.scale), int(rect[1] * self.scale))
+
+    def rect(self, rect):
+        if self.surface is None:
+            return rect
+        s = self.scale
+        x, y, w, h = rect
+        return pygame.Rect(int(x * s), int(y * s), max(1, round(w * s)), max(1, round(h * s)))
+
+    def area(self, sprite):
+        if self.areas is None:
+            return sprite.area
+        return self.areas[id(sprite.area)]
+
+    def blits(self, sprites):
+        atlas = self.atlas
+        if self.surface is None:
+            return [(atlas, sprite.rect, sprite.area) for sprite in sprites]
+        s = self.scale
+        areas = self.areas
+        return [(atlas, (int(sprite.rect.x * s), int(sprite.rect.y * s)), areas[id(sprite.area)])
+                for sprite in sprites]
+
+    def present(self, screen):
+        if self.surface is None:
+            return
+        if self.smooth:
+            pygame.transform.smoothscale(self.surface, screen.get_size(), screen)
+        else:
+            pygame.transform.scale(self.surface, screen.get_size(), screen)
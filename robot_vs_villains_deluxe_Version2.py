@@ -3,6 +3,28 @@ import random
 import sys
 import os
 import json
+import time
+import argparse
+import atexit
+from text_cache import TextCache
+from spatial_hash import SpatialHash
+from villain_engine import VillainEngine, HAVE_NUMPY
+if HAVE_NUMPY:
+    from steering import FlowField
+    from particles import ParticleSystem
+from dirty_render import DirtyRenderer
+from pools import SpritePool
+from profiler import FrameProfiler
+from minimap import Minimap, MINIMAP_HZ
+from asset_cache import AssetCache
+from atlas import TextureAtlas
+from collision import Narrowphase
+from score_store import HighScoreStore
+from save_worker import SaveWorker
+from score_submitter import ScoreSubmitter, PENDING_SCORES_FILE
+import leaderboard
+from render_scale import RenderScaler
+from quality import QualityGovernor
 
 # SETTINGS AND CONSTANTS
 WIDTH, HEIGHT = 1280, 720
@@ -19,7 +41,38 @@ ROBOT_SHIELD = 0
 BOSS_HEALTH = [40, 70]
 SCORE_PER_VILLAIN = 15
 SCORE_PER_BOSS = 250
+SPATIAL_CELL_SIZE = 128
+USE_VILLAIN_ENGINE = HAVE_NUMPY
+STEERING = "chase"  # or "flow": opt-in flow field with separation (--steering flow)
+STRESS_VILLAINS = 5000
+TICK_MS = 1000 / FPS
+TICK_SLACK_MS = 2
+MAX_CATCHUP_TICKS = 5
+DIRTY_RECTS = False
+RENDER_SCALE = 1.0
+SMOOTH_UPSCALE = False
+QUALITY_GOVERNOR = True
+BG_COLOR = (10, 10, 30)
+BG_CACHE_BYTES = 256 * 1024 * 1024
+BULLET_POOL_SIZE = 96
+POWERUP_POOL_SIZE = 32
+ENEMY_BULLET_POOL_SIZE = 48
+BOSS_BULLET_DAMAGE = 1
+HUD_RECT = pygame.Rect(0, 0, WIDTH, 48)
+# effect: (particle count, colour, speed, lifetime in ticks)
+PARTICLE_EFFECTS = {
+    "villain_hit": (6, (255, 220, 120), 3, 10),
+    "villain_kill": (60, (255, 140, 40), 5, 32),
+    "boss_hit": (12, (255, 255, 160), 4, 14),
+    "boss_kill": (600, (255, 80, 255), 9, 60),
+    "robot_hit": (30, (255, 60, 60), 4, 20),
+    "shield_hit": (30, (0, 200, 255), 4, 20),
+}
+MINIMAP_RECT = pygame.Rect(WIDTH - 140, HEIGHT - 140, 120, 120)
 POWERUP_TYPES = ["health", "shield", "double_shot", "rapid_fire"]
+HIGH_SCORES_FILE = "high_scores.json"
+LEADERBOARD = None  # "host[:port]" of a leaderboard server; None keeps scores local
+PLAYER_NAME = "PLAYER"
 ASSET_DIR = "assets"
 BG_FILES = [os.path.join(ASSET_DIR, "stage-preview", f"bg{i+1}.png") for i in range(BG_LAYERS)]
 ROBOT_IMG = os.path.join(ASSET_DIR, "observer.png")
@@ -33,24 +86,65 @@ BG_MUSIC = os.path.join(ASSET_DIR, "BEAT this week.ogg")
 SHOOT_SOUND = os.path.join(ASSET_DIR, "shoot.wav")
 EXPLOSION_SOUND = os.path.join(ASSET_DIR, "explosion.wav")
 POWERUP_SOUND = os.path.join(ASSET_DIR, "shoot.wav")
+SOUND_CHANNELS = 16
+SOUND_VOICE_LIMIT = 4
 
 
 
+assets = AssetCache()
+
 def load_image(filename, size=None):
     try:
-        img = pygame.image.load(filename).convert_alpha()
-        if size:
-            img = pygame.transform.scale(img, size)
-        return img
+        return assets.load(filename, size)
     except Exception:
         return None
 
-def play_sound(filename):
-    try:
-        s = pygame.mixer.Sound(filename)
-        s.play()
-    except Exception:
-        pass
+class SoundBank:
+    # Sounds are decoded once and played on a fixed pool of reserved channels,
+    # so nothing touches the disk while the game loop is running.
+    def __init__(self, filenames, channels=SOUND_CHANNELS, voice_limit=SOUND_VOICE_LIMIT):
+        self.sounds = {}
+        for filename in filenames:
+            if filename in self.sounds:
+                continue
+            try:
+                self.sounds[filename] = pygame.mixer.Sound(filename)
+            except Exception:
+                pass
+        try:
+            if pygame.mixer.get_num_channels() < channels:
+                pygame.mixer.set_num_channels(channels)
+            pygame.mixer.set_reserved(channels)
+            self.channels = [pygame.mixer.Channel(i) for i in range(channels)]
+        except Exception:
+            self.channels = []
+        self.voice_limit = voice_limit
+        self.played = 0
+        self.dropped = 0
+
+    def play(self, filename, volume=1.0):
+        sound = self.sounds.get(filename)
+        if sound is None:
+            return None
+        voices = 0
+        free = None
+        for channel in self.channels:
+            if channel.get_busy():
+                if channel.get_sound() is sound:
+                    voices += 1
+            elif free is None:
+                free = channel
+        if free is None or voices >= self.voice_limit:
+            self.dropped += 1
+            return None
+        free.set_volume(volume)
+        free.play(sound)
+        self.played += 1
+        return free
+
+def play_sound(filename, volume=1.0):
+    if sound_bank is not None:
+        sound_bank.play(filename, volume)
 
 def play_music(filename, loop=True):
     try:
@@ -74,38 +168,83 @@ def play_music(filename, volume=1.0, loop=True):
 def clamp(val, minv, maxv):
     return max(minv, min(val, maxv))
 
-pygame.init()
-pygame.mixer.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption("Robot vs Villains Deluxe")
-clock = pygame.time.Clock()
-
-robot_img = load_image(ROBOT_IMG, (ROBOT_SIZE, ROBOT_SIZE))
-villain_basic_img = load_image(VILLAIN_BASIC_IMG, (VILLAIN_SIZE, VILLAIN_SIZE))
-villain_fast_img = load_image(VILLAIN_FAST_IMG, (VILLAIN_SIZE, VILLAIN_SIZE))
-villain_tank_img = load_image(VILLAIN_TANK_IMG, (VILLAIN_SIZE, VILLAIN_SIZE))
-boss_img = load_image(BOSS_IMG, (ROBOT_SIZE * 2, ROBOT_SIZE * 2))
-bullet_img = load_image(BULLET_IMG, (BULLET_SIZE, BULLET_SIZE))
-powerup_img = load_image(POWERUP_IMG, (32, 32))
-bg_imgs = [load_image(bg, (WIDTH, HEIGHT)) for bg in BG_FILES]
-
-font_large = pygame.font.SysFont("arial", 72)
-font_medium = pygame.font.SysFont("arial", 40)
-font_small = pygame.font.SysFont("arial", 28)
-
-def load_high_scores():
-    try:
-        with open("high_scores.json", "r") as f:
-            return json.load(f)
-    except Exception:
-        return []
-
-def save_high_scores(scores):
+# Display, audio and assets are created by setup() rather than at import, so
+# the simulation can be imported and run without a window.
+screen = None
+clock = None
+sound_bank = None
+text_cache = None
+robot_img = villain_basic_img = villain_fast_img = villain_tank_img = None
+boss_img = bullet_img = powerup_img = None
+bg_imgs = []
+sprite_atlas = None
+background_cache = None
+view_cache = None
+
+# Shared stand-ins for sprite images that failed to load.
+FALLBACK_SPRITES = {
+    "robot": ((ROBOT_SIZE, ROBOT_SIZE), (0, 120, 255)),
+    "bullet": ((BULLET_SIZE // 2, BULLET_SIZE), (255, 255, 0)),
+    "basic": ((VILLAIN_SIZE, VILLAIN_SIZE), (200, 30, 50)),
+    "fast": ((VILLAIN_SIZE, VILLAIN_SIZE), (255, 100, 10)),
+    "tank": ((VILLAIN_SIZE, VILLAIN_SIZE), (90, 90, 90)),
+    "boss": ((ROBOT_SIZE * 2, ROBOT_SIZE * 2), (255, 0, 255)),
+    "health": ((32, 32), (0, 255, 0)),
+    "shield": ((32, 32), (0, 200, 255)),
+    "double_shot": ((32, 32), (255, 255, 0)),
+    "rapid_fire": ((32, 32), (255, 100, 255)),
+}
+
+def fallback_sprite(key):
+    size, color = FALLBACK_SPRITES[key]
+    image = pygame.Surface(size).convert_alpha()
+    image.fill(color)
+    return image
+
+def build_sprite_atlas():
+    # All sprite images, loaded or fallback, live in one atlas surface.
+    atlas = TextureAtlas()
+    loaded = {"robot": robot_img, "bullet": bullet_img, "basic": villain_basic_img,
+              "fast": villain_fast_img, "tank": villain_tank_img, "boss": boss_img}
+    for ptype in POWERUP_TYPES:
+        loaded[ptype] = powerup_img
+    for key, image in loaded.items():
+        atlas.add(key, image or fallback_sprite(key))
+    atlas.build()
+    return atlas
+
+def setup(headless=False):
+    global screen, clock, sound_bank, text_cache
+    global robot_img, villain_basic_img, villain_fast_img, villain_tank_img
+    global boss_img, bullet_img, powerup_img, bg_imgs, sprite_atlas
+    global font_large, font_medium, font_small
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.init()
     try:
-        with open("high_scores.json", "w") as f:
-            json.dump(scores, f)
-    except Exception:
+        pygame.mixer.init()
+    except pygame.error:
         pass
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption("Robot vs Villains Deluxe")
+    clock = pygame.time.Clock()
+    sound_bank = SoundBank([SHOOT_SOUND, EXPLOSION_SOUND, POWERUP_SOUND])
+
+    robot_img = load_image(ROBOT_IMG, (ROBOT_SIZE, ROBOT_SIZE))
+    villain_basic_img = load_image(VILLAIN_BASIC_IMG, (VILLAIN_SIZE, VILLAIN_SIZE))
+    villain_fast_img = load_image(VILLAIN_FAST_IMG, (VILLAIN_SIZE, VILLAIN_SIZE))
+    villain_tank_img = load_image(VILLAIN_TANK_IMG, (VILLAIN_SIZE, VILLAIN_SIZE))
+    boss_img = load_image(BOSS_IMG, (ROBOT_SIZE * 2, ROBOT_SIZE * 2))
+    bullet_img = load_image(BULLET_IMG, (BULLET_SIZE, BULLET_SIZE))
+    powerup_img = load_image(POWERUP_IMG, (32, 32))
+    bg_imgs = [load_image(bg, (WIDTH, HEIGHT)) for bg in BG_FILES]
+    sprite_atlas = build_sprite_atlas()
+
+    text_cache = TextCache(lambda size: pygame.font.SysFont("arial", size))
+    font_large = text_cache.font(72)
+    font_medium = text_cache.font(40)
+    font_small = text_cache.font(28)
 
 def load_profile():
     try:
@@ -115,23 +254,31 @@ def load_profile():
         return {"max_level": 1, "settings": {}}
 
 def save_profile(profile):
-    try:
-        with open("profile.json", "w") as f:
-            json.dump(profile, f)
-    except Exception:
-        pass
-
-high_scores = load_high_scores()
-profile = load_profile()
+    saver.submit("profile.json", "w", json.dumps(profile))
+
+def open_saves():
+    # Reads the save files and starts the worker thread that writes them;
+    # it drains at exit. Only called for a real session, so importing this
+    # module (benchmark.py, headless runs) touches no files or threads.
+    global saver, high_scores, profile
+    saver = SaveWorker()
+    atexit.register(saver.close)
+    high_scores = HighScoreStore(HIGH_SCORES_FILE, writer=saver)
+    profile = load_profile()
+
+saver = None
+high_scores = None
+score_submitter = None  # set up in __main__ when a leaderboard is configured
+profile = {"max_level": 1, "settings": {}}
 global_volume = 1.0
+profiler = FrameProfiler()
 
 # Sprite and entity classes
 
 class Robot(pygame.sprite.Sprite):
     def __init__(self):
         super().__init__()
-        self.image = robot_img
-        
+        self.image, self.area, self.mask = sprite_atlas.frame("robot")
         self.rect = self.image.get_rect(center=(WIDTH//2, HEIGHT - ROBOT_SIZE * 2))
         self.health = ROBOT_HEALTH
         self.shield = ROBOT_SHIELD
@@ -143,29 +290,23 @@ class Robot(pygame.sprite.Sprite):
         self.score = 0
         self.powerups = {"double_shot": 0, "rapid_fire": 0}
 
-    def move(self, keys):
-        if keys[pygame.K_a] or keys[pygame.K_LEFT]:
-            self.rect.x -= self.speed
-        if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
-            self.rect.x += self.speed
-        if keys[pygame.K_w] or keys[pygame.K_UP]:
-            self.rect.y -= self.speed
-        if keys[pygame.K_s] or keys[pygame.K_DOWN]:
-            self.rect.y += self.speed
+    def move(self, move):
+        self.rect.x += move[0] * self.speed
+        self.rect.y += move[1] * self.speed
         self.rect.x = clamp(self.rect.x, 0, WIDTH - self.rect.width)
         self.rect.y = clamp(self.rect.y, 0, HEIGHT - self.rect.height)
 
-    def shoot(self, bullets_group):
+    def shoot(self, bullets_group, pool):
         if self.cooldown == 0:
-            bullets_group.add(Bullet((self.rect.centerx, self.rect.top)))
+            pool.spawn(bullets_group, (self.rect.centerx, self.rect.top))
             if self.double_shot:
-                bullets_group.add(Bullet((self.rect.left + 16, self.rect.top)))
-                bullets_group.add(Bullet((self.rect.right - 16, self.rect.top)))
+                pool.spawn(bullets_group, (self.rect.left + 16, self.rect.top))
+                pool.spawn(bullets_group, (self.rect.right - 16, self.rect.top))
             play_sound(SHOOT_SOUND, global_volume)
             self.cooldown = self.fire_rate // (2 if self.rapid_fire else 1)
 
-    def update(self, keys):
-        self.move(keys)
+    def update(self, move):
+        self.move(move)
         if self.cooldown > 0:
             self.cooldown -= 1
         for p in ["double_shot", "rapid_fire"]:
@@ -180,20 +321,31 @@ class Robot(pygame.sprite.Sprite):
             self.powerups[ptype] = frames
             setattr(self, ptype, True)
 
-    def draw(self, surface):
-        surface.blit(self.image, self.rect)
+    def draw(self, surface, view):
+        surface.blit(view.atlas, view.pos(self.rect), view.area(self))
         
-        pygame.draw.rect(surface, (0, 255, 0), (self.rect.x, self.rect.y - 16, int(ROBOT_SIZE * (self.health / ROBOT_HEALTH)), 8))
+        pygame.draw.rect(surface, (0, 255, 0), view.rect((self.rect.x, self.rect.y - 16, int(ROBOT_SIZE * (self.health / ROBOT_HEALTH)), 8)))
         if self.shield > 0:
-            pygame.draw.ellipse(surface, (0, 200, 255), self.rect.inflate(12, 12), 2)
+            pygame.draw.ellipse(surface, (0, 200, 255), view.rect(self.rect.inflate(12, 12)), 2)
 
 class Bullet(pygame.sprite.Sprite):
-    def __init__(self, pos, speed=-18):
+    def __init__(self, pos=(0, 0), speed=-18, pool=None):
         super().__init__()
-        self.image = bullet_img
-
+        self.image, self.area, self.mask = sprite_atlas.frame("bullet")
         self.rect = self.image.get_rect(center=pos)
         self.speed = speed
+        self.pool = pool
+
+    def reset(self, pos, speed=-18):
+        self.rect.center = pos
+        self.speed = speed
+
+    def kill(self):
+        if self.pool is not None and self.alive():
+            super().kill()
+            self.pool.release(self)
+        else:
+            super().kill()
 
     def update(self):
         self.rect.y += self.speed
@@ -201,29 +353,40 @@ class Bullet(pygame.sprite.Sprite):
             self.kill()
 
 class Villain(pygame.sprite.Sprite):
-    def __init__(self, villain_type="basic", speed=3):
+    def __init__(self, villain_type="basic", speed=3, engine=None, rng=random):
         super().__init__()
+        self.engine = None
         self.type = villain_type
+        self.image, self.area, self.mask = sprite_atlas.frame(villain_type)
         if villain_type == "basic":
-            self.image = villain_basic_img
-            if not villain_basic_img:
-                self.image = pygame.Surface((VILLAIN_SIZE, VILLAIN_SIZE))
-                self.image.fill((200, 30, 50))
             self.health = 3
         elif villain_type == "fast":
-            self.image = villain_fast_img
-            if not villain_fast_img:
-                self.image = pygame.Surface((VILLAIN_SIZE, VILLAIN_SIZE))
-                self.image.fill((255, 100, 10))
             self.health = 2
         elif villain_type == "tank":
-            self.image = villain_tank_img
-            if not villain_tank_img:
-                self.image = pygame.Surface((VILLAIN_SIZE, VILLAIN_SIZE))
-                self.image.fill((90, 90, 90))
             self.health = 7
-        self.rect = self.image.get_rect(topleft=(random.randint(0, WIDTH - VILLAIN_SIZE), -VILLAIN_SIZE))
+        self.rect = self.image.get_rect(topleft=(rng.randint(0, WIDTH - VILLAIN_SIZE), -VILLAIN_SIZE))
         self.speed = speed
+        if engine is not None:
+            engine.add(self, self._health)
+
+    # While a villain lives in a VillainEngine its health is stored there.
+    @property
+    def health(self):
+        if self.engine is not None:
+            return int(self.engine.health[self.slot])
+        return self._health
+
+    @health.setter
+    def health(self, value):
+        if self.engine is not None:
+            self.engine.health[self.slot] = value
+        else:
+            self._health = value
+
+    def kill(self):
+        if self.engine is not None:
+            self.engine.release(self)
+        super().kill()
 
     def update(self, robot_pos):
         dx = robot_pos[0] - self.rect.centerx
@@ -235,14 +398,11 @@ class Villain(pygame.sprite.Sprite):
             self.kill()
 
 class Boss(pygame.sprite.Sprite):
-    def __init__(self, health=40):
+    def __init__(self, health=40, rng=random):
         super().__init__()
         self.max_health = health
-        self.image = boss_img
-        if not boss_img:
-            self.image = pygame.Surface((ROBOT_SIZE * 2, ROBOT_SIZE * 2))
-            self.image.fill((255, 0, 255))
-        self.rect = self.image.get_rect(center=(random.randint(ROBOT_SIZE * 2, WIDTH - ROBOT_SIZE * 2), -ROBOT_SIZE * 2))
+        self.image, self.area, self.mask = sprite_atlas.frame("boss")
+        self.rect = self.image.get_rect(center=(rng.randint(ROBOT_SIZE * 2, WIDTH - ROBOT_SIZE * 2), -ROBOT_SIZE * 2))
         self.health = health
         self.speed = 2
         self.shoot_timer = 0
@@ -256,56 +416,195 @@ class Boss(pygame.sprite.Sprite):
         if self.rect.top > HEIGHT:
             self.rect.top = -ROBOT_SIZE * 2
 
-    def draw(self, surface):
-        surface.blit(self.image, self.rect)
-        pygame.draw.rect(surface, (255, 0, 0), (self.rect.x, self.rect.y - 24, self.rect.width, 12))
-        pygame.draw.rect(surface, (0, 255, 0), (self.rect.x, self.rect.y - 24, int(self.rect.width * (self.health / self.max_health)), 12))
+    def draw(self, surface, view):
+        surface.blit(view.atlas, view.pos(self.rect), view.area(self))
+        pygame.draw.rect(surface, (255, 0, 0), view.rect((self.rect.x, self.rect.y - 24, self.rect.width, 12)))
+        pygame.draw.rect(surface, (0, 255, 0), view.rect((self.rect.x, self.rect.y - 24, int(self.rect.width * (self.health / self.max_health)), 12)))
 
 class Powerup(pygame.sprite.Sprite):
-    def __init__(self, ptype, pos):
+    def __init__(self, ptype="health", pos=(0, 0), pool=None):
         super().__init__()
         self.ptype = ptype
-        self.image = powerup_img
-        if not powerup_img:
-            self.image = pygame.Surface((32, 32))
-            color = {"health":(0,255,0), "shield":(0,200,255), "double_shot":(255,255,0), "rapid_fire":(255,100,255)}
-            self.image.fill(color.get(ptype, (255,255,255)))
+        self.image, self.area, self.mask = sprite_atlas.frame(ptype)
         self.rect = self.image.get_rect(center=pos)
         self.speed = 4
-    
+        self.pool = pool
+
+    def reset(self, ptype, pos):
+        self.ptype = ptype
+        self.image, self.area, self.mask = sprite_atlas.frame(ptype)
+        self.rect.size = self.image.get_size()  # reuse the Rect, no new one per spawn
+        self.rect.center = pos
+
+    def kill(self):
+        if self.pool is not None and self.alive():
+            super().kill()
+            self.pool.release(self)
+        else:
+            super().kill()
+
     def update(self):
         self.rect.y += self.speed
         if self.rect.top > HEIGHT:
             self.kill()
 
+def has_binary_alpha(img):
+    # Every pixel fully opaque or fully transparent, with nothing between.
+    return pygame.mask.from_surface(img, 0).count() == pygame.mask.from_surface(img, 254).count()
+
 class Background:
-    def __init__(self, bg_imgs):
-        self.layers = bg_imgs
-        self.offsets = [0 for _ in self.layers]
+    # Each layer is kept as a strip of two stacked copies, per render scale,
+    # so drawing a scrolled layer is one blit of a window into its strip
+    # and nothing is allocated while a frame is drawn. prepare() runs at
+    # game start: if the whole cycle of layer offsets for that scroll speed
+    # fits in cache_bytes, every composited frame is built up front and
+    # each frame is then one opaque blit. Otherwise (the default cap holds
+    # a full-resolution cycle only at low quality) frames are composited
+    # as they are drawn, which is kept cheap: the bottom layer is
+    # flattened onto BG_COLOR once, and layers above whose alpha is all
+    # 0 or 255 are run-length encoded, so their transparent runs are
+    # skipped and opaque runs copied rather than blended. Strips and the
+    # cycle are kept
+    # across games; prebuild() makes the strips for every scale the
+    # governor may pick, so set_quality() only switches to another strip
+    # set and drops a cycle built for a different quality until the next
+    # prepare().
+    def __init__(self, bg_imgs, cache_bytes=None):
+        self.source = list(bg_imgs)
+        self.offsets = [0 for _ in self.source]
+        self.scrolling = any(self.source)
+        self.cache_bytes = BG_CACHE_BYTES if cache_bytes is None else cache_bytes
+        self.strip_sets = {}
+        self.frames = {}
+        self.cycle = None
+        self.quality = None
+        self.hits = 0
+        self.misses = 0
+        self.warned = False
+        self.set_quality(1.0, len(self.source))
+
+    def build_strips(self, scale):
+        size = (int(WIDTH * scale), int(HEIGHT * scale))
+        strips = []
+        for i, img in enumerate(self.source):
+            if not img:
+                strips.append(None)
+                continue
+            if scale != 1:
+                img = pygame.transform.smoothscale(img, size)
+            if i == 0:
+                # The bottom layer always lands on BG_COLOR, so it is
+                # blended onto it here once and drawn as an opaque copy.
+                strip = pygame.Surface((size[0], size[1] * 2)).convert()
+                strip.fill(BG_COLOR)
+                copy = 0
+            else:
+                strip = pygame.Surface((size[0], size[1] * 2), img.get_flags(), img)
+                # Onto a cleared strip, BLEND_RGBA_MAX copies alpha as-is.
+                copy = pygame.BLEND_RGBA_MAX if strip.get_flags() & pygame.SRCALPHA else 0
+                strip.fill((0, 0, 0, 0))
+            for y in (0, size[1]):
+                strip.blit(img, (0, y), None, copy)
+            if strip.get_flags() & pygame.SRCALPHA and has_binary_alpha(img):
+                strip.set_alpha(255, pygame.RLEACCEL)
+            strips.append(strip)
+        self.strip_sets[scale] = strips
+        return strips
+
+    def prebuild(self, scales):
+        for scale in scales:
+            if scale not in self.strip_sets:
+                self.build_strips(scale)
+
+    def set_quality(self, scale, layers):
+        layers = max(1, layers)
+        if self.quality == (scale, layers):
+            return
+        self.quality = (scale, layers)
+        self.scale = scale
+        self.size = (int(WIDTH * scale), int(HEIGHT * scale))
+        self.strips = self.strip_sets.get(scale) or self.build_strips(scale)
+        self.layers = self.strips[:layers]
+        self.frame_bytes = self.size[0] * self.size[1] * 4
+        if self.cycle is not None and self.cycle[:2] != self.quality:
+            self.frames = {}
+            self.cycle = None
+
+    def reset(self):
+        self.offsets = [0 for _ in self.source]
+
+    def prepare(self, speed):
+        # Builds the composited cycle for this speed when it fits the cap.
+        if not self.scrolling or self.cycle == self.quality + (speed,):
+            return
+        self.frames = {}
+        self.cycle = None
+        saved = list(self.offsets)
+        keys = []
+        seen = set()
+        while True:
+            key = tuple(self.offsets[:len(self.layers)])
+            if key in seen:
+                break
+            seen.add(key)
+            keys.append(key)
+            self.update(speed)
+        needed = len(keys) * self.frame_bytes
+        if needed > self.cache_bytes:
+            self.offsets = saved
+            if not self.warned:
+                self.warned = True
+                print(f"background cycle needs {needed >> 20} MB ({len(keys)} frames), over the "
+                      f"{self.cache_bytes >> 20} MB cap (--bg-cache-mb); compositing it per frame",
+                      file=sys.stderr)
+            return
+        # SDL re-encodes a run-length encoded layer whenever it is blitted
+        # to a different surface, so every frame is composed on one scratch
+        # surface and copied out.
+        scratch = pygame.Surface(self.size).convert()
+        for key in keys:
+            self.offsets[:len(key)] = key
+            self.compose(scratch)
+            self.frames[key] = scratch.copy()
+        self.offsets = saved
+        self.cycle = self.quality + (speed,)
 
     def update(self, speed=1):
         for i in range(len(self.offsets)):
             self.offsets[i] = (self.offsets[i] + speed * (i + 1)) % HEIGHT
 
+    def compose(self, surface):
+        if not self.layers[0]:
+            surface.fill(BG_COLOR)
+        width, height = self.size
+        for i, strip in enumerate(self.layers):
+            if strip:
+                y = int(self.offsets[i] * self.scale) % height
+                surface.blit(strip, (0, 0), (0, height - y, width, height))
+
     def draw(self, surface):
-        for i, img in enumerate(self.layers):
-            if img:
-                y = self.offsets[i]
-                surface.blit(img, (0, y - HEIGHT))
-                surface.blit(img, (0, y))
+        if not self.scrolling:
+            surface.fill(BG_COLOR)
+            return
+        frame = self.frames.get(tuple(self.offsets[:len(self.layers)]))
+        if frame is None:
+            self.misses += 1
+            self.compose(surface)
+            return
+        self.hits += 1
+        surface.blit(frame, (0, 0))
 
 def draw_text(surface, text, size, color, x, y, center=True):
-    font = pygame.font.SysFont('arial', size)
-    txt = font.render(text, True, color)
+    txt = text_cache.render(text, size, color)
     rect = txt.get_rect()
     if center:
         rect.center = (x, y)
     else:
         rect.topleft = (x, y)
-    surface.blit(txt, rect)
+    return surface.blit(txt, rect)
 
 def draw_hud(surface, robot, level, paused=False):
-    pygame.draw.rect(surface, (0, 0, 0), (0, 0, WIDTH, 48))
+    pygame.draw.rect(surface, (0, 0, 0), HUD_RECT)
     draw_text(surface, f"Score: {robot.score}", 32, (255, 255, 0), 20, 10, center=False)
     draw_text(surface, f"Health: {robot.health}", 32, (255, 0, 0), 220, 10, center=False)
     draw_text(surface, f"Shield: {robot.shield}", 32, (0, 200, 255), 400, 10, center=False)
@@ -346,10 +645,7 @@ def start_menu(high_scores):
         for i, opt in enumerate(options):
             color = (0, 255, 0) if selected == i else (180, 180, 180)
             draw_text(screen, opt, 48, color, WIDTH // 2, HEIGHT // 2 + i * 64)
-        if high_scores:
-            draw_text(screen, f"High Score: {max(high_scores)}", 36, (255, 180, 0), WIDTH // 2, HEIGHT - 80)
-        else:
-            draw_text(screen, f"High Score: 0", 36, (255, 180, 0), WIDTH // 2, HEIGHT - 80)
+        draw_text(screen, f"High Score: {high_scores.best}", 36, (255, 180, 0), WIDTH // 2, HEIGHT - 80)
         pygame.display.flip()
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
@@ -413,15 +709,20 @@ def settings_menu():
                         pygame.mixer.music.set_volume(volume)
                         return
 
+def record_score(score, high_scores):
+    # The local table stays as the offline best; the leaderboard copy is
+    # sent in the background and never holds up the screen.
+    high_scores.add(score)
+    if score_submitter is not None:
+        score_submitter.submit(score, profile.get("name", PLAYER_NAME))
+
 def game_over_screen(score, high_scores):
     pygame.mixer.music.stop()
     screen.fill((60, 0, 0))
     draw_text(screen, "GAME OVER!", 72, (255, 255, 255), WIDTH // 2, HEIGHT // 3)
     draw_text(screen, f"Score: {score}", 44, (255, 180, 0), WIDTH // 2, HEIGHT // 2)
     draw_text(screen, "Press Enter to return to menu", 36, (255, 255, 255), WIDTH // 2, HEIGHT // 2 + 80)
-    high_scores.append(score)
-    high_scores.sort(reverse=True)
-    save_high_scores(high_scores)
+    record_score(score, high_scores)
     pygame.display.flip()
     waiting = True
     while waiting:
@@ -438,9 +739,7 @@ def victory_screen(score, high_scores):
     draw_text(screen, "VICTORY!", 72, (255, 255, 255), WIDTH // 2, HEIGHT // 3)
     draw_text(screen, f"Score: {score}", 44, (255, 255, 0), WIDTH // 2, HEIGHT // 2)
     draw_text(screen, "Press Enter to return to menu", 36, (255, 255, 255), WIDTH // 2, HEIGHT // 2 + 80)
-    high_scores.append(score)
-    high_scores.sort(reverse=True)
-    save_high_scores(high_scores)
+    record_score(score, high_scores)
     pygame.display.flip()
     waiting = True
     while waiting:
@@ -451,58 +750,111 @@ def victory_screen(score, high_scores):
             if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
                 waiting = False
 
-def play_game(level=1):
-    global global_volume
-    play_music(BG_MUSIC, global_volume)
-    robot = Robot()
-    bullets = pygame.sprite.Group()
-    villains = pygame.sprite.Group()
-    bosses = pygame.sprite.Group()
-    powerups = pygame.sprite.Group()
-    bg = Background(bg_imgs)
-    wave = 0
-    paused = False
-    boss_spawned = False
-    next_wave_timer = 0
-    frames = 0
-
-    # Initial spawn basic villains
-    for _ in range(VILLAIN_WAVES[level - 1]):
-        villains.add(Villain("basic", VILLAIN_SPEEDS[level - 1]))
-
-    running = True
-    while running:
-        frames += 1
-        keys = pygame.key.get_pressed()
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    robot.shoot(bullets)
-                if event.key == pygame.K_ESCAPE:
-                    paused = not paused
-
-        if paused:
-            draw_hud(screen, robot, level, paused=True)
-            pygame.display.flip()
-            clock.tick(FPS)
-            continue
+def read_move(keys):
+    mx = 0
+    my = 0
+    if keys[pygame.K_a] or keys[pygame.K_LEFT]:
+        mx -= 1
+    if keys[pygame.K_d] or keys[pygame.K_RIGHT]:
+        mx += 1
+    if keys[pygame.K_w] or keys[pygame.K_UP]:
+        my -= 1
+    if keys[pygame.K_s] or keys[pygame.K_DOWN]:
+        my += 1
+    return (mx, my)
+
+def new_engine(capacity=64):
+    # Flow-field steering runs on the engine's arrays; without numpy every
+    # villain chases the robot on its own.
+    flow = FlowField((WIDTH, HEIGHT)) if STEERING == "flow" else None
+    return VillainEngine(capacity, flow)
+
+class Simulation:
+    # Game rules for one run of a level, with no input handling or drawing.
+    # step() advances one fixed tick and all randomness comes from self.rng,
+    # so the same seed and inputs always play out the same way.
+    def __init__(self, level=1, seed=None, particles=None):
+        self.level = level
+        self.particles = particles
+        self.rng = random.Random(seed)
+        self.robot = Robot()
+        self.bullets = pygame.sprite.Group()
+        self.enemy_bullets = pygame.sprite.Group()
+        self.villains = pygame.sprite.Group()
+        self.bosses = pygame.sprite.Group()
+        self.powerups = pygame.sprite.Group()
+        self.engine = new_engine() if USE_VILLAIN_ENGINE else None
+        self.villain_hash = SpatialHash(SPATIAL_CELL_SIZE)
+        self.boss_hash = SpatialHash(SPATIAL_CELL_SIZE)
+        self.powerup_hash = SpatialHash(SPATIAL_CELL_SIZE)
+        self.bullet_pool = SpritePool(lambda pool: Bullet(pool=pool), BULLET_POOL_SIZE, "bullet")
+        self.powerup_pool = SpritePool(lambda pool: Powerup(pool=pool), POWERUP_POOL_SIZE, "powerup")
+        self.enemy_bullet_pool = SpritePool(lambda pool: Bullet(pool=pool), ENEMY_BULLET_POOL_SIZE, "enemy bullet")
+        self.wave = 0
+        self.boss_spawned = False
+        self.next_wave_timer = 0
+        self.narrowphase = Narrowphase()
+        self.ticks = 0
+        self.outcome = None
+
+        # Initial spawn basic villains
+        for _ in range(VILLAIN_WAVES[level - 1]):
+            self.villains.add(Villain("basic", VILLAIN_SPEEDS[level - 1], self.engine, self.rng))
+
+    def effect(self, name, pos):
+        if self.particles is not None:
+            count, color, speed, life = PARTICLE_EFFECTS[name]
+            self.particles.emit(pos, count, color, speed, life)
+
+    def robot_hit(self, pos):
+        self.effect("shield_hit" if self.robot.shield > 0 else "robot_hit", pos)
+
+    def finish(self, outcome):
+        self.outcome = outcome
+        return outcome
+
+    def step(self, move=(0, 0), shoot=False):
+        outcome = self.advance(move, shoot)
+        self.narrowphase.end_tick()
+        return outcome
+
+    def advance(self, move, shoot):
+        if self.outcome:
+            return self.outcome
+        self.ticks += 1
+        level = self.level
+        robot = self.robot
+        bullets = self.bullets
+        villains = self.villains
+        bosses = self.bosses
+        powerups = self.powerups
+        engine = self.engine
+        narrow = self.narrowphase
+        rng = self.rng
+
+        if shoot:
+            robot.shoot(bullets, self.bullet_pool)
 
         # Updates
-        bg.update(speed=1 + level)
-        robot.update(keys)
+        robot.update(move)
         bullets.update()
-        for villain in villains.sprites():
-            villain.update(robot.rect.center)
+        self.enemy_bullets.update()
+        if engine is not None:
+            engine.update(robot.rect.center, HEIGHT)
+        else:
+            for villain in villains.sprites():
+                villain.update(robot.rect.center)
         for boss in bosses.sprites():
             boss.update(robot.rect.center)
         powerups.update()
+        if self.particles is not None:
+            self.particles.update()
+        profiler.mark("updates")
 
         # Collisions: bullets vs villains
+        self.villain_hash.rebuild(villains)
         for bullet in bullets.sprites():
-            hit_villains = pygame.sprite.spritecollide(bullet, villains, False)
+            hit_villains = narrow.filter(bullet, self.villain_hash.collide(bullet))
             for villain in hit_villains:
                 villain.health -= 1
                 bullet.kill()
@@ -510,133 +862,112 @@ def play_game(level=1):
                     robot.score += SCORE_PER_VILLAIN
                     play_sound(EXPLOSION_SOUND, global_volume)
                     villain.kill()
-                    if random.random() < 0.14:
-                        ptype = random.choice(POWERUP_TYPES)
-                        powerups.add(Powerup(ptype, villain.rect.center))
+                    self.effect("villain_kill", villain.rect.center)
+                    if rng.random() < 0.14:
+                        ptype = rng.choice(POWERUP_TYPES)
+                        self.powerup_pool.spawn(powerups, ptype, villain.rect.center)
+                else:
+                    self.effect("villain_hit", bullet.rect.midtop)
+        profiler.mark("hit_villains")
 
         # bullets vs bosses
+        self.boss_hash.rebuild(bosses)
         for bullet in bullets.sprites():
-            hit_bosses = pygame.sprite.spritecollide(bullet, bosses, False)
+            hit_bosses = narrow.filter(bullet, self.boss_hash.collide(bullet))
             for boss in hit_bosses:
                 boss.health -= 2
                 bullet.kill()
                 robot.score += 3
                 play_sound(EXPLOSION_SOUND, global_volume)
+                self.effect("boss_hit", bullet.rect.midtop)
                 if boss.health <= 0:
                     robot.score += SCORE_PER_BOSS
                     boss.kill()
+                    self.effect("boss_kill", boss.rect.center)
                     play_sound(EXPLOSION_SOUND, global_volume)
                     if len(bosses) == 0:
-                        victory_screen(robot.score, high_scores)
-                        return
+                        return self.finish("victory")
+        profiler.mark("hit_bosses")
 
         # villains/bosses vs robot
-        for villain in villains.sprites():
-            if robot.rect.colliderect(villain.rect):
-                if robot.shield > 0:
-                    robot.shield -= 1
-                else:
-                    robot.health -= 2 if villain.type == "tank" else 1
-                villain.kill()
-                play_sound(EXPLOSION_SOUND, global_volume)
-                if robot.health <= 0:
-                    game_over_screen(robot.score, high_scores)
-                    return
+        for villain in narrow.filter(robot, self.villain_hash.collide(robot)):
+            self.robot_hit(villain.rect.center)
+            self.effect("villain_kill", villain.rect.center)
+            if robot.shield > 0:
+                robot.shield -= 1
+            else:
+                robot.health -= 2 if villain.type == "tank" else 1
+            villain.kill()
+            play_sound(EXPLOSION_SOUND, global_volume)
+            if robot.health <= 0:
+                return self.finish("game_over")
 
         for boss in bosses.sprites():
-            if robot.rect.colliderect(boss.rect):
+            if robot.rect.colliderect(boss.rect) and narrow.overlap(robot, boss):
+                self.robot_hit(robot.rect.center)
                 if robot.shield > 0:
                     robot.shield -= 2
                 else:
                     robot.health -= 4
                 play_sound(EXPLOSION_SOUND, global_volume)
                 if robot.health <= 0:
-                    game_over_screen(robot.score, high_scores)
-                    return
+                    return self.finish("game_over")
+        profiler.mark("robot_contact")
+
+        # boss bullets vs robot
+        for bullet in narrow.filter(robot, pygame.sprite.spritecollide(robot, self.enemy_bullets, False)):
+            bullet.kill()
+            self.robot_hit(bullet.rect.center)
+            if robot.shield > 0:
+                robot.shield -= 1
+            else:
+                robot.health -= BOSS_BULLET_DAMAGE
+            play_sound(EXPLOSION_SOUND, global_volume)
+            if robot.health <= 0:
+                return self.finish("game_over")
+        profiler.mark("robot_shot")
 
         # powerups vs robot
-        for powerup in powerups.sprites():
-            if robot.rect.colliderect(powerup.rect):
-                if powerup.ptype == "health":
-                    robot.health = clamp(robot.health + 4, 0, ROBOT_HEALTH)
-                elif powerup.ptype == "shield":
-                    robot.shield = clamp(robot.shield + 5, 0, 20)
-                elif powerup.ptype == "double_shot":
-                    robot.add_powerup("double_shot", FPS * 10)
-                elif powerup.ptype == "rapid_fire":
-                    robot.add_powerup("rapid_fire", FPS * 10)
-                play_sound(POWERUP_SOUND, global_volume)
-                powerup.kill()
+        self.powerup_hash.rebuild(powerups)
+        for powerup in narrow.filter(robot, self.powerup_hash.collide(robot)):
+            if powerup.ptype == "health":
+                robot.health = clamp(robot.health + 4, 0, ROBOT_HEALTH)
+            elif powerup.ptype == "shield":
+                robot.shield = clamp(robot.shield + 5, 0, 20)
+            elif powerup.ptype == "double_shot":
+                robot.add_powerup("double_shot", FPS * 10)
+            elif powerup.ptype == "rapid_fire":
+                robot.add_powerup("rapid_fire", FPS * 10)
+            play_sound(POWERUP_SOUND, global_volume)
+            powerup.kill()
+        profiler.mark("pickups")
 
         # Level progression & spawning
-        if len(villains) == 0 and not boss_spawned:
-            next_wave_timer += 1
-            if next_wave_timer > FPS * 2:
-                wave += 1
-                next_wave_timer = 0
-                if wave < 3:
+        if len(villains) == 0 and not self.boss_spawned:
+            self.next_wave_timer += 1
+            if self.next_wave_timer > FPS * 2:
+                self.wave += 1
+                self.next_wave_timer = 0
+                if self.wave < 3:
                     # Spawn mixed waves of villains
                     for _ in range(VILLAIN_WAVES[level - 1] // 3):
-                        villains.add(Villain("fast", VILLAIN_SPEEDS[level - 1] + 2))
-                        villains.add(Villain("tank", max(2, VILLAIN_SPEEDS[level - 1] - 1)))
+                        villains.add(Villain("fast", VILLAIN_SPEEDS[level - 1] + 2, engine, rng))
+                        villains.add(Villain("tank", max(2, VILLAIN_SPEEDS[level - 1] - 1), engine, rng))
                     for _ in range(VILLAIN_WAVES[level - 1] // 2):
-                        villains.add(Villain("basic", VILLAIN_SPEEDS[level - 1]))
+                        villains.add(Villain("basic", VILLAIN_SPEEDS[level - 1], engine, rng))
                 else:
-                    boss_spawned = True
+                    self.boss_spawned = True
                     base_health = BOSS_HEALTH[(level-1) % len(BOSS_HEALTH)]
-                    bosses.add(Boss(health=base_health + 15 * level))
+                    bosses.add(Boss(health=base_health + 15 * level, rng=rng))
 
         # Remove expired powerups (falling off screen)
         for powerup in powerups.sprites():
             if powerup.rect.top > HEIGHT:
                 powerup.kill()
 
-        # DRAW
-        bg.draw(screen)
-        robot.draw(screen)
-        bullets.draw(screen)
-        villains.draw(screen)
-        for boss in bosses:
-            boss.draw(screen)
-        powerups.draw(screen)
-        draw_hud(screen, robot, level, paused=False)
-
-        # Minimap
-        minimap_rect = pygame.Rect(WIDTH - 140, HEIGHT - 140, 120, 120)
-        pygame.draw.rect(screen, (10, 10, 30), minimap_rect)
-        rx = minimap_rect.x + int((robot.rect.centerx / WIDTH) * 120)
-        ry = minimap_rect.y + int((robot.rect.centery / HEIGHT) * 120)
-        pygame.draw.circle(screen, (0, 200, 255), (rx, ry), 6)
-        for villain in villains:
-            vx = minimap_rect.x + int((villain.rect.centerx / WIDTH) * 120)
-            vy = minimap_rect.y + int((villain.rect.centery / HEIGHT) * 120)
-            pygame.draw.circle(screen, (255, 60, 60), (vx, vy), 4)
-        for boss in bosses:
-            bx = minimap_rect.x + int((boss.rect.centerx / WIDTH) * 120)
-            by = minimap_rect.y + int((boss.rect.centery / HEIGHT) * 120)
-            pygame.draw.circle(screen, (255, 0, 255), (bx, by), 8)
-        for powerup in powerups:
-            px = minimap_rect.x + int((powerup.rect.centerx / WIDTH) * 120)
-            py = minimap_rect.y + int((powerup.rect.centery / HEIGHT) * 120)
-            pygame.draw.circle(screen, (255, 255, 0), (px, py), 3)
-        pygame.draw.rect(screen, (200, 200, 200), minimap_rect, 2)
-
-        # Powerup status display
-        px = 20
-        if robot.double_shot:
-            draw_text(screen, "Double Shot", 24, (255, 255, 0), px, HEIGHT - 40, center=False)
-            px += 140
-        if robot.rapid_fire:
-            draw_text(screen, "Rapid Fire", 24, (255, 100, 255), px, HEIGHT - 40, center=False)
-            px += 140
-
         # End game check
         if robot.health <= 0:
-            game_over_screen(robot.score, high_scores)
-            return
-
-        pygame.display.flip()
-        clock.tick(FPS)
+            return self.finish("game_over")
 
         # Boss attacks: shoot downwards bullets
         for boss in bosses.sprites():
@@ -646,7 +977,273 @@ def play_game(level=1):
                 bx = boss.rect.centerx
                 by = boss.rect.bottom
                 for i in [-40, 0, 40]:
-                    bullets.add(Bullet((bx + i, by), speed=10))
+                    self.enemy_bullet_pool.spawn(self.enemy_bullets, (bx + i, by), 10)
+        profiler.mark("spawning")
+        return None
+
+def new_minimap():
+    minimap = Minimap(MINIMAP_RECT, (WIDTH, HEIGHT), FPS, MINIMAP_HZ)
+    minimap.add_marker("robot", (0, 200, 255), 6)
+    minimap.add_marker("villain", (255, 60, 60), 4)
+    minimap.add_marker("boss", (255, 0, 255), 8)
+    minimap.add_marker("powerup", (255, 255, 0), 3)
+    return minimap
+
+def minimap_layers(sim):
+    def centers(group):
+        points = [sprite.rect.center for sprite in group]
+        return [p[0] for p in points], [p[1] for p in points]
+
+    robot = sim.robot
+    if sim.engine is not None:
+        vx, vy = sim.engine.centers()
+    else:
+        vx, vy = centers(sim.villains)
+    return [
+        ("robot", [robot.rect.centerx], [robot.rect.centery]),
+        ("villain", vx, vy),
+        ("boss",) + centers(sim.bosses),
+        ("powerup",) + centers(sim.powerups),
+    ]
+
+def render(surface, sim, bg, dirty, minimap, view):
+    # Sprites are redrawn every frame; when the background is static the
+    # DirtyRenderer erases and pushes only the rects they cover. The HUD is
+    # only repainted when its contents change, the minimap at MINIMAP_HZ.
+    # Below full render scale the world goes to view's offscreen surface
+    # and is stretched over the whole screen, so every frame is a full one
+    # and the rects added for the world are in view coordinates.
+    robot = sim.robot
+    world = view.target(surface)
+    if world is not surface:
+        dirty.invalidate()
+        bg.draw(world)
+    elif not dirty.begin():
+        bg.draw(world)
+    robot.draw(world, view)
+    dirty.add(robot.rect.inflate(12, 12).union((robot.rect.x, robot.rect.y - 16, ROBOT_SIZE, 8)))
+    for group in (sim.bullets, sim.enemy_bullets, sim.villains):
+        for rect in world.blits(view.blits(group)):
+            dirty.add(rect)
+    for boss in sim.bosses:
+        boss.draw(world, view)
+        dirty.add(boss.rect.union((boss.rect.x, boss.rect.y - 24, boss.rect.width, 12)))
+    for rect in world.blits(view.blits(sim.powerups)):
+        dirty.add(rect)
+    profiler.mark("draw")
+    if sim.particles is not None:
+        rect = sim.particles.draw(world, view.scale)
+        if rect:
+            dirty.add(rect)
+        profiler.mark("particles")
+    if world is not surface:
+        view.present(surface)
+        profiler.mark("upscale")
+
+    # Powerup status display
+    px = 20
+    if robot.double_shot:
+        dirty.add(draw_text(surface, "Double Shot", 24, (255, 255, 0), px, HEIGHT - 40, center=False))
+        px += 140
+    if robot.rapid_fire:
+        dirty.add(draw_text(surface, "Rapid Fire", 24, (255, 100, 255), px, HEIGHT - 40, center=False))
+        px += 140
+
+    if dirty.changed("hud", (robot.score, robot.health, robot.shield, sim.level)) or dirty.touches(HUD_RECT):
+        draw_hud(surface, robot, sim.level, paused=False)
+        dirty.add(HUD_RECT, erase=False)
+    profiler.mark("hud")
+
+    # Minimap
+    if minimap.due():
+        minimap.refresh(minimap_layers(sim))
+    dirty.add(minimap.draw(surface), erase=False)
+    profiler.mark("minimap")
+
+def quality_levels():
+    # (render scale, parallax layers, minimap Hz), best first; the
+    # governor steps through these to hold the frame budget.
+    return [
+        (RENDER_SCALE, BG_LAYERS, MINIMAP_HZ),
+        (RENDER_SCALE, 1, MINIMAP_HZ),
+        (RENDER_SCALE * 0.75, 1, max(1, MINIMAP_HZ * 2 // 3)),
+        (RENDER_SCALE * 0.5, 1, max(1, MINIMAP_HZ // 3)),
+    ]
+
+def stage_background():
+    # One Background for the whole session, so its strips and cached
+    # cycle survive from one game to the next.
+    global background_cache
+    if background_cache is None or background_cache.source != bg_imgs:
+        background_cache = Background(bg_imgs)
+    return background_cache
+
+def stage_view():
+    # Likewise one RenderScaler, keeping its scaled atlases between games.
+    global view_cache
+    if view_cache is None or view_cache.source is not sprite_atlas:
+        view_cache = RenderScaler((WIDTH, HEIGHT), sprite_atlas, RENDER_SCALE, SMOOTH_UPSCALE)
+    return view_cache
+
+def play_game(level=1, seed=None):
+    global global_volume
+    play_music(BG_MUSIC, global_volume)
+    sim = Simulation(level, seed, ParticleSystem(seed=seed) if HAVE_NUMPY else None)
+    bg = stage_background()
+    dirty = DirtyRenderer(screen, enabled=DIRTY_RECTS)
+    minimap = new_minimap()
+    view = stage_view()
+    governor = QualityGovernor(quality_levels(), TICK_MS, QUALITY_GOVERNOR)
+
+    def set_quality(scale, layers, hz):
+        view.set_scale(scale)
+        bg.set_quality(scale, layers)
+        minimap.set_rate(hz)
+        dirty.invalidate()
+
+    # Everything a quality step can switch to is built now, not mid-game.
+    levels = governor.levels if governor.enabled else [governor.current()]
+    scales = sorted({scale for scale, _, _ in levels}, reverse=True)
+    view.prebuild(scales)
+    bg.prebuild(scales)
+    set_quality(*governor.current())
+    bg.reset()
+    bg.prepare(speed=1 + level)
+    if not bg.scrolling:
+        background = pygame.Surface((WIDTH, HEIGHT)).convert()
+        bg.draw(background)
+        dirty.set_background(background)
+    else:
+        bg.compose(view.target(screen))  # encode RLE layers for this target now, not in frame one
+    paused = False
+    shoot = False
+    # Fixed timestep: the simulation always advances in TICK_MS steps and
+    # the frame loop runs as many as real time calls for, within a cap.
+    lag = TICK_MS
+    clock.tick()
+
+    while True:
+        profiler.begin_frame()
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                pygame.quit()
+                sys.exit()
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_SPACE:
+                    shoot = True
+                if event.key == pygame.K_ESCAPE:
+                    paused = not paused
+                if event.key == pygame.K_F3:
+                    profiler.toggle_overlay()
+                    dirty.invalidate()
+
+        if paused:
+            draw_hud(screen, sim.robot, level, paused=True)
+            pygame.display.flip()
+            dirty.invalidate()
+            clock.tick(FPS)
+            lag = 0
+            continue
+
+        move = read_move(pygame.key.get_pressed())
+        profiler.mark("events")
+        steps = 0
+        while lag >= TICK_MS - TICK_SLACK_MS and steps < MAX_CATCHUP_TICKS:
+            lag -= TICK_MS
+            steps += 1
+            bg.update(speed=1 + level)
+            if sim.step(move, shoot):
+                break
+            shoot = False
+        if steps == MAX_CATCHUP_TICKS:
+            lag = min(lag, 0)
+
+        if sim.outcome == "victory":
+            victory_screen(sim.robot.score, high_scores)
+            return
+        if sim.outcome == "game_over":
+            game_over_screen(sim.robot.score, high_scores)
+            return
+
+        render(screen, sim, bg, dirty, minimap, view)
+        overlay = profiler.draw_overlay(screen, draw_text, 20, 60)
+        if overlay:
+            dirty.add(overlay)
+        profiler.skip()
+        dirty.present()
+        profiler.mark("flip")
+        lag += clock.tick(FPS)
+        quality = governor.update(clock.get_rawtime())
+        if quality:
+            set_quality(*quality)
+        profiler.mark("tick")
+        profiler.end_frame()
+
+def autopilot(sim):
+    # Scripted input for headless runs: line up under the nearest target
+    # and keep firing.
+    robot = sim.robot
+    targets = sim.bosses.sprites() or sim.villains.sprites()
+    mx = 0
+    if targets:
+        x = robot.rect.centerx
+        tx = min(targets, key=lambda t: abs(t.rect.centerx - x)).rect.centerx
+        mx = (tx > x) - (tx < x)
+    return (mx, 1), True
+
+def run_headless(ticks=FPS * 60, level=1, seed=0, controller=autopilot):
+    sim = Simulation(level, seed)
+    for _ in range(ticks):
+        move, shoot = controller(sim)
+        profiler.begin_frame()
+        done = sim.step(move, shoot)
+        profiler.end_frame()
+        if done:
+            break
+    return sim
+
+def stress_mode(count=STRESS_VILLAINS):
+    # Endless chase with no collisions, for checking how many villains the
+    # batched engine can move at FPS. Only on-screen villains are synced.
+    if not HAVE_NUMPY:
+        print("Stress mode needs numpy installed")
+        return
+    robot = Robot()
+    engine = new_engine(count)
+    villains = pygame.sprite.Group()
+    for i in range(count):
+        villain = Villain(random.choice(["basic", "fast", "tank"]), random.choice(VILLAIN_SPEEDS), engine)
+        villain.rect.y = -VILLAIN_SIZE - random.randint(0, HEIGHT)
+        engine.y[villain.slot] = villain.rect.y
+        villains.add(villain)
+    view = RenderScaler((WIDTH, HEIGHT), sprite_atlas)
+    bounds = screen.get_rect()
+    while True:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                return
+        robot.update(read_move(pygame.key.get_pressed()))
+        engine.step(robot.rect.center)
+        visible = engine.sync(engine.visible(bounds))
+        screen.fill((10, 10, 30))
+        screen.blits(view.blits(visible), False)
+        robot.draw(screen, view)
+        draw_text(screen, f"Villains: {len(engine)}  FPS: {clock.get_fps():.0f}", 32, (255, 255, 0), 20, 10, center=False)
+        pygame.display.flip()
+        clock.tick(FPS)
+
+def parse_address(text, default_host, default_port):
+    # "host", "host:port" or ":port"
+    host, sep, port = text.rpartition(":")
+    if not sep:
+        return text, default_port
+    return host or default_host, int(port)
+
+def positive_int(text):
+    value = int(text)
+    if value <= 0:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
 
 def main():
     while True:
@@ -654,4 +1251,59 @@ def main():
         play_game(level=1)
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Robot vs Villains Deluxe")
+    parser.add_argument("--stress", type=int, nargs="?", const=STRESS_VILLAINS, help="run the villain stress mode")
+    parser.add_argument("--headless", action="store_true", help="run the simulation without a display")
+    parser.add_argument("--dirty", action="store_true", help="only push changed screen regions when possible")
+    parser.add_argument("--steering", choices=["flow", "chase"], default=STEERING, help="how villains move toward the robot")
+    parser.add_argument("--render-scale", type=float, default=RENDER_SCALE, help="internal resolution as a fraction of the window")
+    parser.add_argument("--smooth-upscale", action="store_true", help="use smoothscale when stretching a reduced render")
+    parser.add_argument("--no-governor", action="store_true", help="keep quality fixed instead of adapting to frame time")
+    parser.add_argument("--minimap-hz", type=positive_int, default=MINIMAP_HZ, help="minimap refresh rate")
+    parser.add_argument("--profile-out", help="record per-frame phase timings to a .csv or .json file")
+    parser.add_argument("--bg-cache-mb", type=int, default=BG_CACHE_BYTES // (1024 * 1024), help="build the whole background cycle at game start if it fits in this many MB")
+    parser.add_argument("--leaderboard", default=LEADERBOARD, metavar="HOST[:PORT]",
+                        help=f"also send scores to this leaderboard server (port defaults to {leaderboard.PORT})")
+    parser.add_argument("--name", help="player name shown on the leaderboard")
+    parser.add_argument("--ticks", type=int, default=FPS * 60)
+    parser.add_argument("--level", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    DIRTY_RECTS = args.dirty
+    STEERING = args.steering
+    BG_CACHE_BYTES = args.bg_cache_mb * 1024 * 1024
+    MINIMAP_HZ = args.minimap_hz
+    RENDER_SCALE = args.render_scale
+    SMOOTH_UPSCALE = args.smooth_upscale
+    QUALITY_GOVERNOR = not args.no_governor
+    if not args.headless and not args.stress:
+        open_saves()
+        if args.name:
+            profile["name"] = args.name
+            save_profile(profile)
+        if args.leaderboard:
+            host, port = parse_address(args.leaderboard, leaderboard.HOST, leaderboard.PORT)
+            score_submitter = ScoreSubmitter(host, port, PENDING_SCORES_FILE, writer=saver)
+            atexit.register(score_submitter.close)  # runs before saver.close, which writes what's left
+    setup(headless=args.headless)
+    if args.profile_out:
+        profiler.start_recording()
+        atexit.register(profiler.export, args.profile_out)
+    if args.headless:
+        start = time.perf_counter()
+        sim = run_headless(args.ticks, args.level, args.seed)
+        elapsed = time.perf_counter() - start
+        print(f"outcome={sim.outcome or 'running'} ticks={sim.ticks} score={sim.robot.score} "
+              f"health={sim.robot.health} ticks/s={sim.ticks / elapsed:.0f}")
+        for name, pool in (("bullets", sim.bullet_pool), ("enemy bullets", sim.enemy_bullet_pool),
+                           ("powerups", sim.powerup_pool)):
+            stats = pool.stats()
+            print(f"{name} pool: capacity={stats['capacity']} high_water={stats['high_water']} "
+                  f"spawned={stats['spawned']} recycled={stats['recycled']}")
+        stats = sim.narrowphase.stats()
+        print(f"narrowphase tests/tick: mean={stats['mean']:.1f} peak={stats['peak']} "
+              f"budget={stats['budget']} over_budget={stats['over_budget']}")
+    elif args.stress:
+        stress_mode(args.stress)
+    else:
+        main()
@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+
+
+def write_file(path, mode, text):
+    # "a" appends; "w" replaces the file atomically through a temp file so
+    # a crash never leaves it half-written.
+    if mode == "a":
+        with open(path, "a") as f:
+            f.write(text)
+        return
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class SaveWorker:
+    # Background thread that does all save-file I/O. submit() only queues
+    # the write under a lock, so the frame loop never waits on the disk.
+    # Pending writes to one path are coalesced: a replace drops whatever
+    # was queued before it and appends are concatenated. A coalesced path
+    # moves to the back of the queue, so writes still land in the order
+    # they were submitted. close() drains the queue and is registered
+    # with atexit by the game.
+    def __init__(self):
+        self.pending = {}
+        self.cond = threading.Condition()
+        self.busy = False
+        self.closing = False
+        self.submitted = 0
+        self.coalesced = 0
+        self.writes = 0
+        self.failures = 0
+        self.last_error = None
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self.total_ms = 0.0
+        self.thread = threading.Thread(target=self.run, name="save-worker", daemon=True)
+        self.thread.start()
+
+    def submit(self, path, mode, text):
+        with self.cond:
+            old = self.pending.pop(path, None)
+            if old is not None:
+                self.coalesced += 1
+                if mode == "a":
+                    mode, text = old[0], old[1] + text
+            self.pending[path] = (mode, text)
+            self.submitted += 1
+            self.cond.notify_all()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.pending and not self.closing:
+                    self.cond.wait()
+                if not self.pending:
+                    return
+                path = next(iter(self.pending))
+                mode, text = self.pending.pop(path)
+                self.busy = True
+            start = time.perf_counter()
+            try:
+                write_file(path, mode, text)
+                error = None
+            except OSError as exc:
+                error = exc
+            ms = (time.perf_counter() - start) * 1000
+            with self.cond:
+                self.busy = False
+                if error is None:
+                    self.writes += 1
+                    self.last_ms = ms
+                    self.max_ms = max(self.max_ms, ms)
+                    self.total_ms += ms
+                else:
+                    self.failures += 1
+                    self.last_error = error
+                self.cond.notify_all()
+
+    def flush(self, timeout=None):
+        # Wait until everything submitted so far is on disk (or failed).
+        with self.cond:
+            return self.cond.wait_for(lambda: not self.pending and not self.busy, timeout)
+
+    def close(self, timeout=5.0):
+        with self.cond:
+            self.closing = True
+            self.cond.notify_all()
+        self.thread.join(timeout)
+
+    def stats(self):
+        with self.cond:
+            return {
+                "submitted": self.submitted,
+                "coalesced": self.coalesced,
+                "pending": len(self.pending),
+                "writes": self.writes,
+                "failures": self.failures,
+                "last_error": str(self.last_error) if self.last_error else None,
+                "last_ms": self.last_ms,
+                "max_ms": self.max_ms,
+                "mean_ms": self.total_ms / self.writes if self.writes else 0.0,
+            }
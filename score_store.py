@@ -0,0 +1,108 @@
+import heapq
+import json
+
+from save_worker import write_file
+
+HIGH_SCORE_LIMIT = 10
+COMPACT_EVERY = 32
+
+
+class HighScoreStore:
+    # Keeps only the best `limit` scores, in a min-heap, with the best one
+    # cached for the menu. A score that makes the table is appended to a
+    # log as "seq score"; every compact_every appends the table is written
+    # to a snapshot with os.replace() and the log is emptied. Log entries
+    # at or below the snapshot's seq are skipped on load, so a crash
+    # between the two steps can't count a score twice. A legacy snapshot
+    # (a bare JSON list of every score) loads too. With a SaveWorker as
+    # writer all file writes happen on its thread.
+    def __init__(self, path, limit=HIGH_SCORE_LIMIT, compact_every=COMPACT_EVERY, writer=None):
+        self.path = path
+        self.writer = writer
+        self.log_path = path + ".log"
+        self.limit = limit
+        self.compact_every = compact_every
+        self.heap = []
+        self.best = 0
+        self.seq = 0
+        self.logged = 0
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = []
+        legacy = isinstance(data, list)
+        if legacy:
+            scores = data
+        else:
+            scores = data.get("scores", [])
+            self.seq = data.get("seq", 0)
+        for score in scores:
+            self.push(int(score))
+        snapshot_seq = self.seq
+        try:
+            with open(self.log_path, "rb+") as f:
+                data = f.read()
+                end = data.rfind(b"\n") + 1
+                if end < len(data):
+                    # Torn last line from a crash: cut it off, or the next
+                    # append would be glued onto it and lost too.
+                    f.truncate(end)
+        except OSError:
+            data = b""
+            end = 0
+        for line in data[:end].splitlines():
+            try:
+                seq, score = map(int, line.split())
+            except ValueError:
+                continue
+            if seq > snapshot_seq:
+                self.push(score)
+                self.seq = max(self.seq, seq)
+                self.logged += 1
+        if (legacy and len(scores) > self.limit) or self.logged >= self.compact_every:
+            self.compact()
+
+    def push(self, score):
+        if len(self.heap) < self.limit:
+            heapq.heappush(self.heap, score)
+        elif score > self.heap[0]:
+            heapq.heapreplace(self.heap, score)
+        else:
+            return False
+        if score > self.best:
+            self.best = score
+        return True
+
+    def add(self, score):
+        if not self.push(score):
+            return False
+        self.seq += 1
+        self.save(self.log_path, "a", f"{self.seq} {score}\n")
+        self.logged += 1
+        if self.logged >= self.compact_every:
+            self.compact()
+        return True
+
+    def compact(self):
+        self.save(self.path, "w", json.dumps({"seq": self.seq, "scores": self.top()}))
+        self.save(self.log_path, "w", "")
+        self.logged = 0
+
+    def save(self, path, mode, text):
+        if self.writer is not None:
+            self.writer.submit(path, mode, text)
+            return
+        try:
+            write_file(path, mode, text)
+        except OSError:
+            pass
+
+    def top(self):
+        return sorted(self.heap, reverse=True)
+
+    def __len__(self):
+        return len(self.heap)
@@ -0,0 +1,121 @@
+import json
+import random
+import threading
+import time
+
+from conn_pool import ConnectionPool
+from leaderboard import HOST, PORT, MAX_SCORE, encode_submit, decode_rank
+from save_worker import write_file
+
+PENDING_SCORES_FILE = "pending_scores.json"
+SUBMIT_CONNECT_TIMEOUT = 1.0
+SUBMIT_READ_TIMEOUT = 2.0
+RETRY_BASE = 0.5
+RETRY_MAX = 30.0
+
+
+def clamp_score(score):
+    # Keeps a score encodable; anything the wire format can't carry would
+    # otherwise stop the sender thread with struct.error.
+    return max(0, min(int(score), MAX_SCORE))
+
+
+class ScoreSubmitter:
+    # Sends scores to the leaderboard server from a background thread.
+    # submit() only queues the score under a lock, so the game-over screen
+    # never waits on the network. Scores that can't be sent stay queued and
+    # are retried with capped exponential backoff; the queue is written to
+    # pending_path whenever it changes and reloaded on start, so scores
+    # from an offline session go out on the next one. Each score keeps the
+    # id it was queued with, which lets the server drop a resend whose
+    # first reply was lost. With a SaveWorker as writer the queue file is
+    # written on its thread too.
+    def __init__(self, host=HOST, port=PORT, pending_path=PENDING_SCORES_FILE, writer=None):
+        self.pool = ConnectionPool(host, port, size=1, connect_timeout=SUBMIT_CONNECT_TIMEOUT,
+                                   read_timeout=SUBMIT_READ_TIMEOUT, max_retries=0)
+        self.pending_path = pending_path
+        self.writer = writer
+        self.cond = threading.Condition()
+        self.pending = self.load()
+        self.closing = False
+        self.failures = 0
+        self.sent = 0
+        self.last_rank = None
+        self.last_error = None
+        self.retry_at = 0.0
+        self.thread = threading.Thread(target=self.run, name="score-submitter", daemon=True)
+        self.thread.start()
+
+    def load(self):
+        try:
+            with open(self.pending_path) as f:
+                return [(int(sid), clamp_score(score), str(name)) for sid, score, name in json.load(f)]
+        except (OSError, ValueError, TypeError):
+            return []
+
+    def persist(self):
+        text = json.dumps(self.pending)
+        if self.writer is not None:
+            self.writer.submit(self.pending_path, "w", text)
+            return
+        try:
+            write_file(self.pending_path, "w", text)
+        except OSError:
+            pass
+
+    def submit(self, score, name):
+        with self.cond:
+            self.pending.append((random.getrandbits(64), clamp_score(score), name))
+            self.persist()
+            self.cond.notify()
+
+    def run(self):
+        while True:
+            with self.cond:
+                while not self.closing and (not self.pending or time.monotonic() < self.retry_at):
+                    self.cond.wait(None if not self.pending else self.retry_at - time.monotonic())
+                if self.closing:
+                    return
+                submission_id, score, name = self.pending[0]
+            try:
+                reply = self.pool.request(encode_submit(submission_id, score, name))
+                rank = decode_rank(reply)[1]
+            except (OSError, ValueError) as exc:
+                with self.cond:
+                    self.failures += 1
+                    self.last_error = str(exc)
+                    delay = min(RETRY_MAX, RETRY_BASE * 2 ** min(self.failures - 1, 16))
+                    self.retry_at = time.monotonic() + delay * random.uniform(0.5, 1.0)
+                    self.cond.notify_all()
+                continue
+            with self.cond:
+                self.pending.pop(0)
+                self.persist()
+                self.sent += 1
+                self.failures = 0
+                self.last_rank = rank
+                self.last_error = None
+                self.cond.notify_all()
+
+    def close(self, timeout=2.0):
+        # Waits up to timeout for queued scores to go out unless the server
+        # is already failing; whatever is left stays on disk for next time.
+        deadline = time.monotonic() + timeout
+        with self.cond:
+            while self.pending and self.failures == 0 and time.monotonic() < deadline:
+                self.cond.wait(deadline - time.monotonic())
+            self.closing = True
+            self.cond.notify()
+        self.thread.join(max(0.0, deadline - time.monotonic()))
+        self.pool.close()
+
+    def stats(self):
+        with self.cond:
+            return {
+                "pending": len(self.pending),
+                "sent": self.sent,
+                "failures": self.failures,
+                "last_rank": self.last_rank,
+                "last_error": self.last_error,
+                "pool": self.pool.metrics(),
+            }
@@ -0,0 +1,68 @@
+SPATIAL_CELL_SIZE = 128
+
+
+class SpatialHash:
+    # Uniform grid broadphase. Sprites are bucketed by the cells their rect
+    # covers; queries hand back candidates in the order they were inserted so
+    # results line up with iterating the original sprite group.
+    def __init__(self, cell_size=SPATIAL_CELL_SIZE):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.order = {}
+
+    def cell_range(self, rect):
+        cs = self.cell_size
+        return (rect.left // cs, (rect.right - 1) // cs,
+                rect.top // cs, (rect.bottom - 1) // cs)
+
+    def clear(self):
+        self.cells.clear()
+        self.order.clear()
+
+    def insert(self, sprite):
+        self.order[sprite] = len(self.order)
+        x0, x1, y0, y1 = self.cell_range(sprite.rect)
+        cells = self.cells
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket is None:
+                    cells[(cx, cy)] = [sprite]
+                else:
+                    bucket.append(sprite)
+
+    def rebuild(self, sprites):
+        self.clear()
+        for sprite in sprites:
+            self.insert(sprite)
+
+    def query(self, rect):
+        x0, x1, y0, y1 = self.cell_range(rect)
+        cells = self.cells
+        if x0 == x1 and y0 == y1:
+            return list(cells.get((x0, y0), ()))
+        seen = set()
+        found = []
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                for sprite in cells.get((cx, cy), ()):
+                    if sprite not in seen:
+                        seen.add(sprite)
+                        found.append(sprite)
+        found.sort(key=self.order.__getitem__)
+        return found
+
+    def collide(self, sprite):
+        # Same result as pygame.sprite.spritecollide(sprite, group, False)
+        # against the group this hash was built from, minus killed sprites.
+        rect = sprite.rect
+        return [other for other in self.query(rect)
+                if other.alive() and rect.colliderect(other.rect)]
+
+    def candidate_pairs(self, sprites):
+        pairs = []
+        for sprite in sprites:
+            candidates = self.query(sprite.rect)
+            if candidates:
+                pairs.append((sprite, candidates))
+        return pairs
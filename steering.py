@@ -0,0 +1,126 @@
+import numpy as np
+
+FLOW_CELL_SIZE = 64
+FLOW_EVERY = 4
+SEPARATION_WEIGHT = 2.0
+SEPARATION_CROWD = 8  # villains more per cell than the next cell for a full push
+SPOT_SIZE = 16
+SPOT_CROWD = 0.5  # the same per spot
+SPOT_NUDGE = 0.5
+GOLDEN_ANGLE = 2.399963229728653
+
+
+def downhill(index, size, cols, rows, x, y, crowd):
+    # Villains counted per square of a size-px grid (index is each one's
+    # square); returns the negative density gradient at x, y, sampled
+    # bilinearly between square centres, with `crowd` more villains per
+    # square than the next one as a slope of 1.
+    count = np.bincount(index, minlength=rows * cols).reshape(rows, cols) / crowd
+    gy, gx = np.gradient(count)
+    slope = (gx + 1j * gy).ravel()  # one gather per corner for both axes
+    fx = np.clip(x / size - 0.5, 0, cols - 1)
+    fy = np.clip(y / size - 0.5, 0, rows - 1)
+    col = fx.astype(np.int64)
+    row = fy.astype(np.int64)
+    tx = fx - col
+    ty = fy - row
+    right = np.minimum(col + 1, cols - 1) - col
+    below = (np.minimum(row + 1, rows - 1) - row) * cols
+    top = row * cols + col
+    s = ((slope[top] * (1 - tx) + slope[top + right] * tx) * (1 - ty)
+         + (slope[top + below] * (1 - tx) + slope[top + below + right] * tx) * ty)
+    return -s.real, -s.imag
+
+
+class FlowField:
+    # Coarse grid of unit vectors pointing from each cell centre at the
+    # target, rebuilt every `every` ticks, so each villain's heading is one
+    # table lookup. Villains within a cell of the target chase it directly
+    # so they don't circle it. Separation pushes each villain down the slope
+    # of villain density, taken per cell to spread a horde over the field
+    # and per SPOT_SIZE spot to even it out inside each cell; villains that
+    # share a spot also get a small fixed per-slot nudge, so exact overlaps
+    # split. Only villains inside the grid are counted or pushed, no push
+    # points off the field, and it is capped at one cell's worth. All of it
+    # is a handful of array ops per tick, whatever the horde size.
+    def __init__(self, world_size, cell_size=FLOW_CELL_SIZE, every=FLOW_EVERY, separation=SEPARATION_WEIGHT):
+        self.cell_size = cell_size
+        self.cols = -(-world_size[0] // cell_size)
+        self.rows = -(-world_size[1] // cell_size)
+        self.every = every
+        self.separation = separation
+        self.spot_cols = -(-self.cols * cell_size // SPOT_SIZE)
+        self.spot_rows = -(-self.rows * cell_size // SPOT_SIZE)
+        rows, cols = np.mgrid[0:self.rows, 0:self.cols]
+        self.center_x = ((cols + 0.5) * cell_size).ravel()
+        self.center_y = ((rows + 0.5) * cell_size).ravel()
+        self.fx = np.zeros(self.rows * self.cols)
+        self.fy = np.zeros(self.rows * self.cols)
+        self.target = (0, 0)
+        self.target_cell = (0, 0)
+        self.countdown = 0
+        self.rebuilds = 0
+
+    def cells(self, x, y):
+        col = np.clip(x // self.cell_size, 0, self.cols - 1)
+        row = np.clip(y // self.cell_size, 0, self.rows - 1)
+        return col, row
+
+    def rebuild(self, target):
+        dx = target[0] - self.center_x
+        dy = target[1] - self.center_y
+        dist = np.maximum(1, np.sqrt(dx * dx + dy * dy))
+        self.fx = dx / dist
+        self.fy = dy / dist
+        self.target = target
+        col, row = self.cells(np.array([target[0]]), np.array([target[1]]))
+        self.target_cell = (int(col[0]), int(row[0]))
+        self.rebuilds += 1
+
+    def steer(self, x, y, target):
+        # x, y: villain centres. Returns a heading per villain.
+        if self.countdown <= 0:
+            self.rebuild(target)
+            self.countdown = self.every
+        self.countdown -= 1
+        col, row = self.cells(x, y)
+        cell = row * self.cols + col
+        ux = self.fx[cell]
+        uy = self.fy[cell]
+
+        tcol, trow = self.target_cell
+        near = np.flatnonzero((np.abs(col - tcol) <= 1) & (np.abs(row - trow) <= 1))
+        if len(near):
+            dx = self.target[0] - x[near]
+            dy = self.target[1] - y[near]
+            dist = np.maximum(1, np.sqrt(dx * dx + dy * dy))
+            ux[near] = dx / dist
+            uy[near] = dy / dist
+
+        # cells() clamps villains outside the grid (still coming on, say)
+        # into edge cells, so only those inside are counted or pushed.
+        inside = np.flatnonzero((x >= 0) & (y >= 0)
+                                & (x < self.cols * self.cell_size) & (y < self.rows * self.cell_size))
+        if len(inside) > 1:
+            xi = x[inside]
+            yi = y[inside]
+            ci = col[inside]
+            ri = row[inside]
+            sx, sy = downhill(cell[inside], self.cell_size, self.cols, self.rows, xi, yi, SEPARATION_CROWD)
+            spot = (yi // SPOT_SIZE) * self.spot_cols + xi // SPOT_SIZE
+            fine_x, fine_y = downhill(spot, SPOT_SIZE, self.spot_cols, self.spot_rows, xi, yi, SPOT_CROWD)
+            sx += fine_x
+            sy += fine_y
+            shared = np.bincount(spot)[spot] > 1
+            angle = inside[shared] * GOLDEN_ANGLE
+            sx[shared] += SPOT_NUDGE * np.cos(angle)
+            sy[shared] += SPOT_NUDGE * np.sin(angle)
+            sx[((ci == 0) & (sx < 0)) | ((ci == self.cols - 1) & (sx > 0))] = 0
+            sy[((ri == 0) & (sy < 0)) | ((ri == self.rows - 1) & (sy > 0))] = 0
+            length = np.maximum(1, np.sqrt(sx * sx + sy * sy))
+            ux[inside] += self.separation * sx / length
+            uy[inside] += self.separation * sy / length
+            norm = np.maximum(1e-9, np.sqrt(ux * ux + uy * uy))
+            ux = ux / norm
+            uy = uy / norm
+        return ux, uy
@@ -0,0 +1,46 @@
+from collections import OrderedDict
+
+TEXT_CACHE_BYTES = 4 * 1024 * 1024
+
+
+class TextCache:
+    # Fonts are opened once per size, rendered strings are kept in an LRU
+    # keyed by (text, size, color) until the pixel budget is used up.
+    def __init__(self, font_factory, max_bytes=TEXT_CACHE_BYTES):
+        self.font_factory = font_factory
+        self.max_bytes = max_bytes
+        self.fonts = {}
+        self.surfaces = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def font(self, size):
+        font = self.fonts.get(size)
+        if font is None:
+            font = self.font_factory(size)
+            self.fonts[size] = font
+        return font
+
+    def render(self, text, size, color, antialias=True):
+        key = (text, size, tuple(color), antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.surfaces.move_to_end(key)
+            self.hits += 1
+            return surface
+        self.misses += 1
+        surface = self.font(size).render(text, antialias, color)
+        cost = surface.get_pitch() * surface.get_height()
+        if cost > self.max_bytes:
+            return surface
+        self.surfaces[key] = surface
+        self.bytes += cost
+        while self.bytes > self.max_bytes:
+            _, old = self.surfaces.popitem(last=False)
+            self.bytes -= old.get_pitch() * old.get_height()
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+        self.bytes = 0
@@ -0,0 +1,120 @@
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+HAVE_NUMPY = np is not None
+VILLAIN_KINDS = {"basic": 0, "fast": 1, "tank": 2}
+
+
+class VillainEngine:
+    # Structure-of-arrays store for villain state. Slots are kept dense
+    # (swap-remove on release) so a whole wave moves in one batched step and
+    # rects are only written back when something needs to read them. With a
+    # flow field villains follow it instead of each chasing the target.
+    def __init__(self, capacity=64, flow=None):
+        self.flow = flow
+        self.sprites = []
+        self.x = np.zeros(capacity, np.int64)
+        self.y = np.zeros(capacity, np.int64)
+        self.w = np.zeros(capacity, np.int64)
+        self.h = np.zeros(capacity, np.int64)
+        self.speed = np.zeros(capacity, np.float64)
+        self.health = np.zeros(capacity, np.int64)
+        self.kind = np.zeros(capacity, np.int8)
+
+    def __len__(self):
+        return len(self.sprites)
+
+    def grow(self):
+        capacity = max(64, len(self.x) * 2)
+        for name in ("x", "y", "w", "h", "speed", "health", "kind"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, sprite, health):
+        slot = len(self.sprites)
+        if slot == len(self.x):
+            self.grow()
+        rect = sprite.rect
+        self.x[slot] = rect.x
+        self.y[slot] = rect.y
+        self.w[slot] = rect.width
+        self.h[slot] = rect.height
+        self.speed[slot] = sprite.speed
+        self.health[slot] = health
+        self.kind[slot] = VILLAIN_KINDS.get(sprite.type, 0)
+        self.sprites.append(sprite)
+        sprite.slot = slot
+        sprite.engine = self
+
+    def release(self, sprite):
+        slot = sprite.slot
+        sprite.engine = None
+        sprite._health = int(self.health[slot])
+        sprite.rect.topleft = (int(self.x[slot]), int(self.y[slot]))
+        last = len(self.sprites) - 1
+        if slot != last:
+            moved = self.sprites[last]
+            for arr in (self.x, self.y, self.w, self.h, self.speed, self.health, self.kind):
+                arr[slot] = arr[last]
+            self.sprites[slot] = moved
+            moved.slot = slot
+        self.sprites.pop()
+
+    def step(self, target):
+        # Batched form of Villain.update's chase: int() truncates toward zero,
+        # which is np.trunc, so every villain lands on the same pixel.
+        n = len(self.sprites)
+        if n == 0:
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        speed = self.speed[:n]
+        if self.flow is not None:
+            ux, uy = self.flow.steer(x + self.w[:n] // 2, y + self.h[:n] // 2, target)
+            x += np.trunc(speed * ux).astype(np.int64)
+            y += np.trunc(speed * uy).astype(np.int64)
+            return
+        dx = target[0] - (x + self.w[:n] // 2)
+        dy = target[1] - (y + self.h[:n] // 2)
+        dist = np.maximum(1, np.sqrt(dx * dx + dy * dy))
+        x += np.trunc(speed * dx / dist).astype(np.int64)
+        y += np.trunc(speed * dy / dist).astype(np.int64)
+
+    def sync(self, slots=None):
+        n = len(self.sprites)
+        if slots is None:
+            sprites = self.sprites
+            xs = self.x[:n].tolist()
+            ys = self.y[:n].tolist()
+        else:
+            sprites = [self.sprites[i] for i in slots.tolist()]
+            xs = self.x[slots].tolist()
+            ys = self.y[slots].tolist()
+        for sprite, x, y in zip(sprites, xs, ys):
+            sprite.rect.topleft = (x, y)
+        return sprites
+
+    def centers(self):
+        n = len(self.sprites)
+        return self.x[:n] + self.w[:n] // 2, self.y[:n] + self.h[:n] // 2
+
+    def visible(self, view):
+        n = len(self.sprites)
+        x = self.x[:n]
+        y = self.y[:n]
+        inside = ((x + self.w[:n] > view.left) & (x < view.right)
+                  & (y + self.h[:n] > view.top) & (y < view.bottom))
+        return np.flatnonzero(inside)
+
+    def update(self, target, bottom):
+        self.step(target)
+        n = len(self.sprites)
+        gone = np.flatnonzero(self.y[:n] > bottom).tolist()
+        if gone:
+            for sprite in [self.sprites[i] for i in gone]:
+                sprite.kill()
+        self.sync()